@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Camera Snapshot API for Bambu Farm Monitor
+Serves cached JPEG thumbnails grabbed from go2rtc so the dashboard grid
+doesn't need a live stream per printer
+"""
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import threading
+import time
+import urllib.request
+import printer_config
+
+app = Flask(__name__)
+CORS(app)
+
+GO2RTC_URL = os.environ.get('GO2RTC_URL', 'http://127.0.0.1:1984').rstrip('/')
+FRAME_TTL = float(os.environ.get('CAMERA_FRAME_TTL', '10'))              # Serve cached frame for this long
+REFRESH_INTERVAL = float(os.environ.get('CAMERA_REFRESH_INTERVAL', '10'))  # Background refresh per printer
+WATCH_WINDOW = float(os.environ.get('CAMERA_WATCH_WINDOW', '60'))        # Keep refreshing printers viewed this recently
+MAX_CONCURRENT_GRABS = int(os.environ.get('CAMERA_MAX_GRABS', '2'))
+FETCH_TIMEOUT = float(os.environ.get('CAMERA_FETCH_TIMEOUT', '10'))
+
+frame_cache = {}     # printer_id -> {'data', 'etag', 'fetched_at'}
+inflight = {}        # printer_id -> threading.Event for the fetch in progress
+last_requested = {}  # printer_id -> time of last client request
+fetch_errors = {}    # printer_id -> last fetch error
+refresh_scheduled = set()  # printer_ids queued or running in refresh_executor
+cache_lock = threading.Lock()
+grab_slots = threading.BoundedSemaphore(MAX_CONCURRENT_GRABS)
+refresh_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_GRABS)
+stats = {'requests': 0, 'cache_hits': 0, 'not_modified': 0, 'grabs': 0, 'grab_errors': 0}
+
+def fetch_frame(printer_id):
+    """Grab a single JPEG frame from go2rtc"""
+    url = f"{GO2RTC_URL}/api/frame.jpeg?src=printer{printer_id}"
+    with grab_slots:
+        stats['grabs'] += 1
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as resp:
+            return resp.read()
+
+def refresh_frame(printer_id, max_age=0):
+    """Fetch a new frame unless the cached one is younger than max_age, sharing one grab among concurrent callers"""
+    with cache_lock:
+        entry = frame_cache.get(printer_id)
+        if entry and time.time() - entry['fetched_at'] < max_age:
+            return entry
+        event = inflight.get(printer_id)
+        leader = event is None
+        if leader:
+            event = threading.Event()
+            inflight[printer_id] = event
+
+    if not leader:
+        event.wait(FETCH_TIMEOUT + 1)
+        return frame_cache.get(printer_id)
+
+    try:
+        data = fetch_frame(printer_id)
+        frame_cache[printer_id] = {
+            'data': data,
+            'etag': hashlib.sha1(data).hexdigest()[:16],
+            'fetched_at': time.time()
+        }
+        fetch_errors.pop(printer_id, None)
+    except Exception as e:
+        stats['grab_errors'] += 1
+        fetch_errors[printer_id] = str(e)
+        print(f"Error grabbing frame for printer {printer_id}: {e}")
+    finally:
+        with cache_lock:
+            inflight.pop(printer_id, None)
+        event.set()
+
+    return frame_cache.get(printer_id)
+
+def get_frame(printer_id):
+    """Get a frame from cache, refreshing it if older than FRAME_TTL"""
+    last_requested[printer_id] = time.time()
+
+    entry = frame_cache.get(printer_id)
+    if entry and time.time() - entry['fetched_at'] < FRAME_TTL:
+        stats['cache_hits'] += 1
+        return entry
+
+    # Fall back to the previous frame if the grab fails
+    return refresh_frame(printer_id, FRAME_TTL) or entry
+
+def background_refresh(printer_id):
+    """Executor task for one printer; it stays scheduled until the task finishes"""
+    try:
+        refresh_frame(printer_id, REFRESH_INTERVAL)
+    finally:
+        with cache_lock:
+            refresh_scheduled.discard(printer_id)
+
+def schedule_refreshes():
+    """Queue one refresh per watched printer whose frame is due and isn't already queued"""
+    now = time.time()
+    for printer_id, requested_at in list(last_requested.items()):
+        if now - requested_at > WATCH_WINDOW:
+            continue
+        entry = frame_cache.get(printer_id)
+        if entry is not None and now - entry['fetched_at'] < REFRESH_INTERVAL:
+            continue
+        with cache_lock:
+            if printer_id in refresh_scheduled or printer_id in inflight:
+                continue
+            refresh_scheduled.add(printer_id)
+        refresh_executor.submit(background_refresh, printer_id)
+
+def refresh_loop():
+    """Keep frames fresh for printers that clients are still looking at"""
+    while True:
+        time.sleep(1)
+        schedule_refreshes()
+
+def start_refresher():
+    """Start the background frame refresher"""
+    threading.Thread(target=refresh_loop, daemon=True).start()
+
+@app.route('/api/camera/printers/<int:printer_id>/frame.jpg', methods=['GET'])
+def get_printer_frame(printer_id):
+    """Get the latest cached camera frame for a printer"""
+    stats['requests'] += 1
+
+    try:
+        printer = printer_config.get_printer(printer_id)
+    except Exception as e:
+        return jsonify({"error": f"Unable to read printer configuration: {e}"}), 500
+    if not printer:
+        return jsonify({"error": "Printer not found"}), 404
+
+    entry = get_frame(printer_id)
+    if not entry:
+        return jsonify({"error": fetch_errors.get(printer_id, "No frame available")}), 502
+
+    response = Response(entry['data'], mimetype='image/jpeg')
+    response.set_etag(entry['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Frame-Age'] = str(int(time.time() - entry['fetched_at']))
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        stats['not_modified'] += 1
+    return response
+
+@app.route('/api/camera/stats', methods=['GET'])
+def get_camera_stats():
+    """Get frame cache statistics"""
+    now = time.time()
+    return jsonify({
+        "stats": stats,
+        "frames": {
+            pid: {"age": int(now - entry['fetched_at']), "bytes": len(entry['data'])}
+            for pid, entry in list(frame_cache.items())
+        },
+        "errors": fetch_errors
+    })
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify({"status": "ok", "cached_frames": len(frame_cache)})
+
+if __name__ == '__main__':
+    start_refresher()
+
+    app.run(host='0.0.0.0', port=int(os.environ.get('CAMERA_API_PORT', '5002')), debug=False)
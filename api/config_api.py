@@ -11,28 +11,16 @@ import os
 import subprocess
 import signal
 from datetime import datetime
+from printer_config import (
+    CONFIG_FILE, load_config, save_config, get_index, editable_index, normalize_tags, resolve_printer_ids,
+    grouping_error, config_error
+)
 
 app = Flask(__name__)
 CORS(app)
 
-CONFIG_FILE = '/app/config/printers.json'
 GO2RTC_YAML = '/app/go2rtc.yaml'
 
-def load_config():
-    """Load printer configuration from JSON file"""
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-
-    # Default empty configuration
-    return {"printers": []}
-
-def save_config(config):
-    """Save printer configuration to JSON file"""
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
-
 def regenerate_go2rtc_config(config):
     """Regenerate go2rtc.yaml from printer configuration"""
     streams_config = "streams:\n"
@@ -95,54 +83,80 @@ def restart_go2rtc():
 
 @app.route('/api/config/printers', methods=['GET'])
 def get_printers():
-    """Get all printer configurations"""
-    config = load_config()
-    return jsonify(config)
+    """Get all printer configurations, optionally filtered by ?group= and ?tag="""
+    group = request.args.get('group')
+    tag = request.args.get('tag')
+    if not group and not tag:
+        return jsonify(load_config())
+
+    index = get_index()
+    printer_ids = resolve_printer_ids(group=group, tag=tag)
+    return jsonify({"printers": [index['by_id'][i] for i in printer_ids]})
+
+@app.route('/api/config/groups', methods=['GET'])
+def get_groups():
+    """Get printer IDs by group and by tag"""
+    index = get_index()
+    return jsonify({"groups": index['by_group'], "tags": index['by_tag']})
 
 @app.route('/api/config/printers/<int:printer_id>', methods=['PUT'])
 def update_printer(printer_id):
     """Update a specific printer configuration"""
-    config = load_config()
+    index = editable_index()
+    config = index['config']
     data = request.json
 
-    # Find and update printer
-    for printer in config['printers']:
-        if printer['id'] == printer_id:
-            if 'name' in data:
-                printer['name'] = data['name']
-            if 'ip' in data:
-                printer['ip'] = data['ip']
-            if 'access_code' in data:
-                printer['access_code'] = data['access_code']
-            if 'serial' in data:
-                printer['serial'] = data['serial']
+    printer = index['by_id'].get(printer_id)
+    if not printer:
+        return jsonify({"error": "Printer not found"}), 404
 
-            # Save configuration
-            save_config(config)
+    error = grouping_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Only a changed serial or IP can introduce a duplicate
+    changed = [f for f in ('serial', 'ip') if f in data and data[f] != printer.get(f)]
+
+    if 'name' in data:
+        printer['name'] = data['name']
+    if 'ip' in data:
+        printer['ip'] = data['ip']
+    if 'access_code' in data:
+        printer['access_code'] = data['access_code']
+    if 'serial' in data:
+        printer['serial'] = data['serial']
+    if 'group' in data:
+        printer['group'] = data['group'] or ''
+    if 'tags' in data:
+        printer['tags'] = normalize_tags(data['tags'])
+
+    error = config_error(config, [printer], changed)
+    if error:
+        return jsonify({"error": error}), 400
 
-            # Regenerate go2rtc config
-            regenerate_go2rtc_config(config)
+    # Save configuration
+    save_config(config)
 
-            # Restart go2rtc
-            restart_go2rtc()
+    # Regenerate go2rtc config
+    regenerate_go2rtc_config(config)
 
-            return jsonify({"success": True, "printer": printer})
+    # Restart go2rtc
+    restart_go2rtc()
 
-    return jsonify({"error": "Printer not found"}), 404
+    return jsonify({"success": True, "printer": printer})
 
 @app.route('/api/config/printers/<int:printer_id>', methods=['DELETE'])
 def delete_printer(printer_id):
     """Delete a specific printer configuration"""
-    config = load_config()
+    index = editable_index()
+    config = index['config']
 
-    # Find and remove printer
-    printers = config.get('printers', [])
-    original_count = len(printers)
-    config['printers'] = [p for p in printers if p['id'] != printer_id]
-
-    if len(config['printers']) == original_count:
+    if printer_id not in index['by_id']:
         return jsonify({"error": "Printer not found"}), 404
 
+    # Remove printer
+    config['printers'] = [p for p in config.get('printers', []) if p['id'] != printer_id]
+
     # Save configuration
     save_config(config)
 
@@ -190,9 +204,13 @@ def setup_required():
 @app.route('/api/config/printers', methods=['POST'])
 def add_printer():
     """Add a new printer configuration"""
-    config = load_config()
+    config = editable_index()['config']
     data = request.json
 
+    error = grouping_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+
     # Determine next printer ID
     existing_ids = [p['id'] for p in config['printers']]
     next_id = max(existing_ids) + 1 if existing_ids else 1
@@ -203,10 +221,17 @@ def add_printer():
         "name": data.get('name', f'Printer {next_id}'),
         "ip": data.get('ip', ''),
         "access_code": data.get('access_code', ''),
-        "serial": data.get('serial', '')
+        "serial": data.get('serial', ''),
+        "group": data.get('group', ''),
+        "tags": normalize_tags(data.get('tags'))
     }
 
     config['printers'].append(new_printer)
+
+    error = config_error(config, [new_printer])
+    if error:
+        return jsonify({"error": error}), 400
+
     save_config(config)
     regenerate_go2rtc_config(config)
     restart_go2rtc()
@@ -222,14 +247,23 @@ def bulk_update_printers():
     # Create configuration with proper IDs
     config = {"printers": []}
     for i, printer_data in enumerate(printers_data, 1):
+        error = grouping_error(printer_data)
+        if error:
+            return jsonify({"error": f"Printer {i}: {error}"}), 400
         config['printers'].append({
             "id": i,
             "name": printer_data.get('name', f'Printer {i}'),
             "ip": printer_data.get('ip', ''),
             "access_code": printer_data.get('access_code', ''),
-            "serial": printer_data.get('serial', '')
+            "serial": printer_data.get('serial', ''),
+            "group": printer_data.get('group', ''),
+            "tags": normalize_tags(printer_data.get('tags'))
         })
 
+    error = config_error(config)
+    if error:
+        return jsonify({"error": error}), 400
+
     save_config(config)
     regenerate_go2rtc_config(config)
     restart_go2rtc()
@@ -292,6 +326,15 @@ def import_config():
             for field in required_fields:
                 if field not in printer:
                     return jsonify({"error": f"Printer {i+1} missing required field: {field}"}), 400
+            error = grouping_error(printer)
+            if error:
+                return jsonify({"error": f"Printer {i+1}: {error}"}), 400
+            if 'tags' in printer:
+                printer['tags'] = normalize_tags(printer['tags'])
+
+        error = config_error(config_data)
+        if error:
+            return jsonify({"error": error}), 400
 
         # Save configuration
         save_config(config_data)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Combined API service for Bambu Farm Monitor
+Serves the config, status, camera and file routes from one ASGI process so they share
+a single config cache and printer state, and config changes reconnect
+MQTT in-process instead of waiting for the browser to call reconnect
+"""
+
+import asyncio
+import os
+import signal
+import threading
+
+from a2wsgi import WSGIMiddleware
+import uvicorn
+
+import printer_config
+import config_api
+import status_api
+import camera_api
+import file_api
+
+WSGI_WORKERS = int(os.environ.get('FARM_API_WORKERS', '16'))          # Threads shared by all four ports
+RECONNECT_DELAY = float(os.environ.get('FARM_RECONNECT_DELAY', '1'))  # Wait for a burst of config saves to settle
+
+reconnect_timer = None
+reconnect_timer_lock = threading.Lock()
+
+
+def dispatch(environ, start_response):
+    """Route /api/config/*, /api/camera/* and /api/files/* to their apps and everything else to the status app"""
+    path = environ.get('PATH_INFO', '')
+    if path.startswith('/api/config/'):
+        return config_api.app(environ, start_response)
+    if path.startswith('/api/camera/'):
+        return camera_api.app(environ, start_response)
+    if path.startswith('/api/files/'):
+        return file_api.app(environ, start_response)
+    return status_api.app(environ, start_response)
+
+
+# Flask is synchronous, so each request runs on a worker thread and a slow frame grab
+# or FTP listing can't hold up requests on the other ports
+app = WSGIMiddleware(dispatch, workers=WSGI_WORKERS)
+
+
+def on_config_saved(config):
+    """Reconnect changed printers once a burst of config saves (one PUT per printer) has settled"""
+    global reconnect_timer
+    with reconnect_timer_lock:
+        if reconnect_timer is not None:
+            reconnect_timer.cancel()
+        reconnect_timer = threading.Timer(RECONNECT_DELAY, status_api.initialize_mqtt_connections)
+        reconnect_timer.daemon = True
+        reconnect_timer.start()
+
+
+async def serve():
+    """Listen on the config, status, camera and file API ports"""
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host='0.0.0.0', port=int(os.environ.get(env, default)), log_level='info'))
+        for env, default in [('CONFIG_API_PORT', '5000'), ('STATUS_API_PORT', '5001'), ('CAMERA_API_PORT', '5002'), ('FILE_API_PORT', '5003')]
+    ]
+
+    # Each uvicorn server would otherwise claim SIGINT/SIGTERM for itself only
+    def shutdown():
+        for server in servers:
+            server.should_exit = True
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown)
+    for server in servers:
+        server.install_signal_handlers = lambda: None
+
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+if __name__ == '__main__':
+    # Initialize config file if it doesn't exist
+    if not os.path.exists(printer_config.CONFIG_FILE):
+        printer_config.save_config(printer_config.load_config())
+
+    printer_config.add_save_listener(on_config_saved)
+
+    # Serve last-known state straight away, then connect to printers in the background
+    status_api.load_snapshot()
+    status_api.start_snapshots()
+    status_api.start_camera_health()
+    threading.Thread(target=status_api.initialize_mqtt_connections, daemon=True).start()
+    camera_api.start_refresher()
+    file_api.start_reaper()
+
+    asyncio.run(serve())
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+File Browser API for Bambu Farm Monitor
+Lists printer storage over FTPS (implicit TLS, port 990) and serves
+thumbnails embedded in .3mf files, with cached listings and pooled connections
+"""
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import ftplib
+import hashlib
+import io
+import os
+import posixpath
+import queue
+import ssl
+import threading
+import time
+import urllib.parse
+import zipfile
+import printer_config
+
+app = Flask(__name__)
+CORS(app)
+
+FTP_PORT = int(os.environ.get('FTP_PORT', '990'))
+FTP_TIMEOUT = float(os.environ.get('FTP_TIMEOUT', '10'))
+FTP_MAX_PER_PRINTER = int(os.environ.get('FTP_MAX_PER_PRINTER', '2'))  # Bambu printers handle few sessions
+FTP_IDLE_TIMEOUT = 60           # Drop pooled connections idle longer than this
+FILE_LIST_TTL = float(os.environ.get('FILE_LIST_TTL', '30'))
+THUMBNAIL_CACHE_SIZE = 256
+RANGE_BLOCK_SIZE = 64 * 1024    # Read-ahead size for ranged reads of .3mf files
+
+listing_cache = {}             # (cache_key, path) -> {'entries', 'fetched_at'}
+thumbnail_cache = OrderedDict()  # (cache_key, path, mtime, size) -> PNG bytes (or None if no thumbnail)
+idle_connections = {}          # connection_key -> Queue of (ftp, last_used)
+printer_slots = {}             # connection_key -> BoundedSemaphore
+pool_lock = threading.Lock()
+cache_lock = threading.Lock()
+listing_executor = ThreadPoolExecutor(max_workers=8)
+stats = {'listings': 0, 'listing_cache_hits': 0, 'thumbnails': 0, 'thumbnail_cache_hits': 0,
+         'connections_opened': 0, 'connections_reused': 0, 'connections_reaped': 0}
+
+class ImplicitFTP_TLS(ftplib.FTP_TLS):
+    """FTP_TLS for implicit TLS servers, reusing the control TLS session on data connections"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sock = None
+
+    @property
+    def sock(self):
+        return self._sock
+
+    @sock.setter
+    def sock(self, value):
+        # Wrap the control connection as soon as it is opened
+        if value is not None and not isinstance(value, ssl.SSLSocket):
+            value = self.context.wrap_socket(value, server_hostname=self.host)
+        self._sock = value
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            # Bambu printers reject data connections that don't resume the control session
+            conn = self.context.wrap_socket(conn, server_hostname=self.host, session=self.sock.session)
+        return conn, size
+
+def open_connection(printer):
+    """Open and log in to a printer's FTPS server"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE  # Bambu printers use self-signed certificates
+
+    ftp = ImplicitFTP_TLS(context=context, timeout=FTP_TIMEOUT)
+    ftp.connect(printer['ip'], FTP_PORT)
+    ftp.login('bblp', printer['access_code'])
+    ftp.prot_p()
+    stats['connections_opened'] += 1
+    return ftp
+
+def connection_key(printer):
+    """Pool key; sessions opened with an old IP or access code are never reused and get reaped"""
+    return (printer['id'], printer['ip'], printer['access_code'])
+
+def cache_key(printer):
+    """Cache key; listings and thumbnails from a printer's old IP are never served"""
+    return (printer['id'], printer['ip'])
+
+class PrinterConnection:
+    """Borrow a pooled FTPS connection, honouring the per-printer concurrency limit"""
+
+    def __init__(self, printer):
+        self.printer = printer
+        self.key = connection_key(printer)
+        self.ftp = None
+
+    def __enter__(self):
+        with pool_lock:
+            slots = printer_slots.setdefault(self.key, threading.BoundedSemaphore(FTP_MAX_PER_PRINTER))
+            pool = idle_connections.setdefault(self.key, queue.Queue())
+
+        if not slots.acquire(timeout=FTP_TIMEOUT * 3):
+            raise TimeoutError(f"Printer {self.printer['id']} has too many FTP sessions in use")
+
+        try:
+            while self.ftp is None:
+                try:
+                    ftp, last_used = pool.get_nowait()
+                except queue.Empty:
+                    self.ftp = open_connection(self.printer)
+                    break
+                if time.time() - last_used > FTP_IDLE_TIMEOUT:
+                    close_quietly(ftp)
+                    continue
+                try:
+                    ftp.voidcmd('NOOP')
+                    self.ftp = ftp
+                    stats['connections_reused'] += 1
+                except Exception:
+                    close_quietly(ftp)
+        except Exception:
+            slots.release()
+            raise
+        return self.ftp
+
+    def __exit__(self, exc_type, exc, tb):
+        # A 5xx reply (e.g. 550 No such file) leaves the session usable, so keep it pooled
+        if exc_type is None or issubclass(exc_type, ftplib.error_perm):
+            idle_connections[self.key].put((self.ftp, time.time()))
+        else:
+            close_quietly(self.ftp)
+        printer_slots[self.key].release()
+        return False
+
+def close_quietly(ftp):
+    """Close an FTP connection, ignoring errors"""
+    try:
+        ftp.quit()
+    except Exception:
+        try:
+            ftp.close()
+        except Exception:
+            pass
+
+def reap_idle_connections():
+    """Close pooled connections idle longer than FTP_IDLE_TIMEOUT"""
+    now = time.time()
+    with pool_lock:
+        pools = list(idle_connections.values())
+
+    for pool in pools:
+        keep = []
+        while True:
+            try:
+                ftp, last_used = pool.get_nowait()
+            except queue.Empty:
+                break
+            if now - last_used > FTP_IDLE_TIMEOUT:
+                close_quietly(ftp)
+                stats['connections_reaped'] += 1
+            else:
+                keep.append((ftp, last_used))
+        for item in keep:
+            pool.put(item)
+
+def reaper_loop():
+    """Release idle printer sessions so they don't hold one of the printer's few FTP slots"""
+    while True:
+        time.sleep(FTP_IDLE_TIMEOUT / 2)
+        try:
+            reap_idle_connections()
+        except Exception as e:
+            print(f"Error reaping FTP connections: {e}")
+
+def start_reaper():
+    """Start the background idle connection reaper"""
+    threading.Thread(target=reaper_loop, daemon=True).start()
+
+def is_not_found(error):
+    """Check for a 550 reply (no such file or directory)"""
+    return isinstance(error, ftplib.error_perm) and str(error).startswith('550')
+
+def normalize_path(path):
+    """Normalize a client-supplied path to an absolute printer path"""
+    return posixpath.normpath('/' + (path or '/').lstrip('/'))
+
+def parse_list_line(line, directory):
+    """Parse a Unix-style LIST line into a file entry"""
+    parts = line.split(None, 8)
+    if len(parts) < 9 or parts[8] in ['.', '..']:
+        return None
+
+    name = parts[8]
+    try:
+        size = int(parts[4])
+    except ValueError:
+        size = 0
+    return {
+        'name': name,
+        'path': posixpath.join(directory, name),
+        'is_dir': parts[0].startswith('d'),
+        'size': size,
+        'mtime': ' '.join(parts[5:8])
+    }
+
+def list_directory(printer, path, refresh=False):
+    """List a printer directory, served from cache within FILE_LIST_TTL"""
+    key = (cache_key(printer), path)
+    entry = listing_cache.get(key)
+    if entry and not refresh and time.time() - entry['fetched_at'] < FILE_LIST_TTL:
+        stats['listing_cache_hits'] += 1
+        return entry, True
+
+    lines = []
+    with PrinterConnection(printer) as ftp:
+        ftp.retrlines(f'LIST {path}', lines.append)
+    stats['listings'] += 1
+
+    entries = []
+    for line in lines:
+        item = parse_list_line(line, path)
+        if not item:
+            continue
+        if not item['is_dir'] and item['name'].lower().endswith('.3mf'):
+            item['thumbnail'] = f"/api/files/printers/{printer['id']}/thumbnail?path={urllib.parse.quote(item['path'])}"
+        entries.append(item)
+    entries.sort(key=lambda e: (not e['is_dir'], e['name'].lower()))
+
+    entry = {'entries': entries, 'fetched_at': time.time()}
+    with cache_lock:
+        listing_cache[key] = entry
+    return entry, False
+
+class FTPRangeReader(io.RawIOBase):
+    """Seekable read-only view of a remote file using REST-offset RETR requests"""
+
+    def __init__(self, ftp, path, size):
+        self.ftp = ftp
+        self.path = path
+        self.size = size
+        self.pos = 0
+        self.blocks = {}  # block offset -> bytes
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        else:
+            self.pos = self.size + offset
+        self.pos = max(0, min(self.pos, self.size))
+        return self.pos
+
+    def fetch_block(self, offset):
+        """Download RANGE_BLOCK_SIZE bytes starting at offset, then abort the transfer"""
+        if offset in self.blocks:
+            return self.blocks[offset]
+
+        wanted = min(RANGE_BLOCK_SIZE, self.size - offset)
+        chunks = []
+        received = 0
+        self.ftp.voidcmd('TYPE I')  # REST requires binary mode
+        conn = self.ftp.transfercmd(f'RETR {self.path}', rest=offset)
+        try:
+            while received < wanted:
+                chunk = conn.recv(min(8192, wanted - received))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                received += len(chunk)
+        finally:
+            conn.close()
+        try:
+            # 226 if the file ended, 426/450 when we closed the transfer early
+            self.ftp.voidresp()
+        except (ftplib.error_temp, ftplib.error_perm):
+            pass
+
+        self.blocks[offset] = b''.join(chunks)
+        return self.blocks[offset]
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.size - self.pos
+        result = []
+        while n > 0 and self.pos < self.size:
+            block_offset = self.pos - (self.pos % RANGE_BLOCK_SIZE)
+            block = self.fetch_block(block_offset)
+            start = self.pos - block_offset
+            piece = block[start:start + n]
+            if not piece:
+                break
+            result.append(piece)
+            self.pos += len(piece)
+            n -= len(piece)
+        return b''.join(result)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def extract_thumbnail(printer, path, size):
+    """Read the embedded plate thumbnail from a .3mf without downloading the whole file"""
+    with PrinterConnection(printer) as ftp:
+        with zipfile.ZipFile(FTPRangeReader(ftp, path, size)) as archive:
+            names = archive.namelist()
+            candidates = ['Metadata/plate_1.png', 'Metadata/thumbnail.png']
+            candidates += sorted(n for n in names if n.startswith('Metadata/') and n.endswith('.png'))
+            for name in candidates:
+                if name in names:
+                    return archive.read(name)
+    return None
+
+def find_entry(printer, path):
+    """Find a file's listing entry (size, mtime) from its cached directory listing"""
+    listing, _ = list_directory(printer, posixpath.dirname(path))
+    for item in listing['entries']:
+        if item['path'] == path:
+            return item
+    return None
+
+def get_thumbnail(printer, path):
+    """Get a .3mf thumbnail, cached by path and mtime"""
+    item = find_entry(printer, path)
+    if not item or item['is_dir']:
+        return None, None
+
+    key = (cache_key(printer), path, item['mtime'], item['size'])
+    with cache_lock:
+        if key in thumbnail_cache:
+            thumbnail_cache.move_to_end(key)
+            stats['thumbnail_cache_hits'] += 1
+            return thumbnail_cache[key], key
+
+    data = extract_thumbnail(printer, path, item['size'])
+    stats['thumbnails'] += 1
+
+    with cache_lock:
+        thumbnail_cache[key] = data
+        while len(thumbnail_cache) > THUMBNAIL_CACHE_SIZE:
+            thumbnail_cache.popitem(last=False)
+    return data, key
+
+def lookup_printer(printer_id):
+    """Look up a printer with FTP credentials, returning (printer, error response)"""
+    try:
+        printer = printer_config.get_printer(printer_id)
+    except Exception as e:
+        return None, (jsonify({"error": f"Unable to read printer configuration: {e}"}), 500)
+    if not printer:
+        return None, (jsonify({"error": "Printer not found"}), 404)
+    if not printer.get('ip') or not printer.get('access_code'):
+        return None, (jsonify({"error": "Printer IP and access code required"}), 400)
+    return printer, None
+
+@app.route('/api/files/printers/<int:printer_id>', methods=['GET'])
+def get_printer_files(printer_id):
+    """List files in a printer directory (?path=, ?refresh=1 to bypass the cache)"""
+    printer, error = lookup_printer(printer_id)
+    if error:
+        return error
+
+    path = normalize_path(request.args.get('path', '/'))
+    try:
+        listing, cached = list_directory(printer, path, refresh=request.args.get('refresh') == '1')
+    except Exception as e:
+        if is_not_found(e):
+            return jsonify({"error": f"Directory not found: {path}"}), 404
+        return jsonify({"error": f"FTP error: {e}"}), 502
+
+    return jsonify({
+        "printer_id": printer_id,
+        "path": path,
+        "entries": listing['entries'],
+        "cached": cached,
+        "age": int(time.time() - listing['fetched_at'])
+    })
+
+@app.route('/api/files/printers', methods=['GET'])
+def get_farm_files():
+    """List the same directory on many printers concurrently (?ids=, ?group=, ?tag=, ?path=)"""
+    try:
+        ids = [int(i) for i in request.args['ids'].split(',') if i.strip()] if request.args.get('ids') else None
+        printer_ids = printer_config.resolve_printer_ids(
+            ids=ids, group=request.args.get('group'), tag=request.args.get('tag')
+        )
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+
+    path = normalize_path(request.args.get('path', '/'))
+    refresh = request.args.get('refresh') == '1'
+
+    def list_one(printer_id):
+        printer = printer_config.get_printer(printer_id)
+        if not printer or not printer.get('ip') or not printer.get('access_code'):
+            return printer_id, {"error": "Printer IP and access code required"}
+        try:
+            listing, cached = list_directory(printer, path, refresh=refresh)
+            return printer_id, {"entries": listing['entries'], "cached": cached,
+                                "age": int(time.time() - listing['fetched_at'])}
+        except Exception as e:
+            return printer_id, {"error": f"FTP error: {e}"}
+
+    return jsonify({"path": path, "printers": dict(listing_executor.map(list_one, printer_ids))})
+
+@app.route('/api/files/printers/<int:printer_id>/thumbnail', methods=['GET'])
+def get_file_thumbnail(printer_id):
+    """Get the embedded thumbnail of a .3mf file (?path=)"""
+    printer, error = lookup_printer(printer_id)
+    if error:
+        return error
+
+    path = normalize_path(request.args.get('path', ''))
+    if not path.lower().endswith('.3mf'):
+        return jsonify({"error": "Thumbnails are only available for .3mf files"}), 400
+
+    try:
+        data, key = get_thumbnail(printer, path)
+    except Exception as e:
+        if is_not_found(e):
+            return jsonify({"error": f"File not found: {path}"}), 404
+        return jsonify({"error": f"Unable to read thumbnail: {e}"}), 502
+    if not data:
+        return jsonify({"error": "No thumbnail found"}), 404
+
+    response = Response(data, mimetype='image/png')
+    response.set_etag(hashlib.sha1(repr(key).encode()).hexdigest()[:16])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def idle_by_printer():
+    """Idle pooled connections per printer ID"""
+    counts = {}
+    for (printer_id, _, _), pool in list(idle_connections.items()):
+        counts[printer_id] = counts.get(printer_id, 0) + pool.qsize()
+    return counts
+
+@app.route('/api/files/stats', methods=['GET'])
+def get_file_stats():
+    """Get listing/thumbnail cache and connection pool statistics"""
+    return jsonify({
+        "stats": stats,
+        "cached_listings": len(listing_cache),
+        "cached_thumbnails": len(thumbnail_cache),
+        "idle_connections": idle_by_printer()
+    })
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify({"status": "ok"})
+
+if __name__ == '__main__':
+    start_reaper()
+
+    app.run(host='0.0.0.0', port=int(os.environ.get('FILE_API_PORT', '5003')), debug=False)
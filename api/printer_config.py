@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Shared printer configuration for Bambu Farm Monitor
+Loads printers.json once per file version and keeps lookup indexes
+(id, serial, IP, group, tag) so the APIs never scan the printer list
+"""
+
+import copy
+import json
+import os
+import threading
+
+CONFIG_FILE = os.environ.get('CONFIG_FILE', '/app/config/printers.json')
+
+_index_lock = threading.Lock()
+_index = None
+_save_listeners = []
+
+
+def config_version():
+    """Return a version token for printers.json (None if missing)"""
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def normalize_tags(tags):
+    """Normalize tags from a list or comma-separated string into a sorted unique list"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    return sorted({str(t).strip() for t in tags if str(t).strip()})
+
+
+def grouping_error(printer):
+    """Return an error message if a printer's group or tags have the wrong type, else None"""
+    group = printer.get('group')
+    if group is not None and not isinstance(group, str):
+        return "group must be a string"
+    tags = printer.get('tags')
+    if tags is not None and not isinstance(tags, str) and not (
+        isinstance(tags, list) and all(isinstance(t, str) for t in tags)
+    ):
+        return "tags must be a string or a list of strings"
+    return None
+
+
+def build_index(config, version):
+    """Build lookup indexes for a configuration"""
+    index = {
+        'version': version,
+        'config': config,
+        'by_id': {},
+        'by_serial': {},
+        'by_ip': {},
+        'by_group': {},
+        'by_tag': {}
+    }
+
+    for printer in config.get('printers', []):
+        printer_id = printer.get('id')
+        index['by_id'][printer_id] = printer
+        if printer.get('serial'):
+            index['by_serial'].setdefault(printer['serial'], []).append(printer_id)
+        if printer.get('ip'):
+            index['by_ip'].setdefault(printer['ip'], []).append(printer_id)
+        if printer.get('group'):
+            index['by_group'].setdefault(printer['group'], []).append(printer_id)
+        for tag in normalize_tags(printer.get('tags')):
+            index['by_tag'].setdefault(tag, []).append(printer_id)
+
+    return index
+
+
+def get_index():
+    """Get the index for the current printers.json, rebuilding only if the file changed"""
+    global _index
+
+    version = config_version()
+    with _index_lock:
+        if _index is not None and _index['version'] == version:
+            return _index
+
+        if version is None:
+            config = {"printers": []}
+        else:
+            with open(CONFIG_FILE, 'r') as f:
+                config = json.load(f)
+
+        _index = build_index(config, version)
+        return _index
+
+
+def load_config():
+    """Load printer configuration (cached per file version, treat as read-only)"""
+    return get_index()['config']
+
+
+def editable_index():
+    """Index over a private deep copy of the config, safe to modify before save_config"""
+    return build_index(copy.deepcopy(load_config()), None)
+
+
+def save_config(config):
+    """Save printer configuration and re-index it as the new version"""
+    global _index
+
+    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+    tmp_path = CONFIG_FILE + '.tmp'
+    with _index_lock:
+        # Index first so a config that can't be indexed is never written, then write
+        # atomically; the cached index only changes once the file has been replaced
+        index = build_index(config, None)
+        with open(tmp_path, 'w') as f:
+            json.dump(config, f, indent=2)
+        os.replace(tmp_path, CONFIG_FILE)
+        index['version'] = config_version()
+        _index = index
+
+    for listener in _save_listeners:
+        try:
+            listener(config)
+        except Exception as e:
+            print(f"Error in config save listener: {e}")
+
+
+def add_save_listener(listener):
+    """Call listener(config) after every save_config (used when both APIs share a process)"""
+    _save_listeners.append(listener)
+
+
+def get_printer(printer_id):
+    """Look up a printer by ID"""
+    return get_index()['by_id'].get(printer_id)
+
+
+def config_error(config, printers=None, fields=('serial', 'ip')):
+    """Return an error message if printers (default: all) have bad group/tags or share a serial or IP, else None"""
+    if printers is None:
+        printers = config.get('printers', [])
+    for printer in printers:
+        error = grouping_error(printer)
+        if error:
+            return f"Printer {printer.get('id')}: {error}"
+
+    index = build_index(config, None)
+    labels = {'serial': ('by_serial', 'serial number'), 'ip': ('by_ip', 'IP address')}
+    for printer in printers:
+        for field in fields:
+            key, label = labels[field]
+            others = [i for i in index[key].get(printer.get(field), []) if i != printer.get('id')]
+            if printer.get(field) and others:
+                return f"Printers {printer.get('id')} and {others[0]} have the same {label}: {printer[field]}"
+    return None
+
+
+def resolve_printer_ids(ids=None, group=None, tag=None):
+    """Resolve printer IDs matching all given selectors (None means unfiltered)"""
+    index = get_index()
+    selected = None
+
+    if ids is not None:
+        selected = {i for i in ids if i in index['by_id']}
+    if group:
+        matched = set(index['by_group'].get(group, ()))
+        selected = matched if selected is None else selected & matched
+    if tag:
+        matched = set(index['by_tag'].get(tag, ()))
+        selected = matched if selected is None else selected & matched
+
+    if selected is None:
+        return list(index['by_id'])
+    return sorted(selected)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Sharded status ingestion for Bambu Farm Monitor
+Splits printers across several status_api instances with rendezvous
+(highest random weight) hashing and fans requests out to all shards
+"""
+
+import hashlib
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Base URLs of every status_api shard, e.g. "http://10.0.0.5:5001,http://10.0.0.6:5001"
+SHARD_NODES = [n.strip().rstrip('/') for n in os.environ.get('STATUS_SHARD_NODES', '').split(',') if n.strip()]
+# This instance's entry in SHARD_NODES (leave empty for an aggregator-only node)
+SHARD_SELF = os.environ.get('STATUS_SHARD_SELF', '').strip().rstrip('/')
+SHARD_TIMEOUT = float(os.environ.get('STATUS_SHARD_TIMEOUT', '3'))
+
+_executor = ThreadPoolExecutor(max_workers=max(4, len(SHARD_NODES)))
+
+
+def sharding_enabled():
+    """Sharding is active when shard nodes are configured"""
+    return len(SHARD_NODES) > 0
+
+
+def printer_shard_key(printer):
+    """Stable key used to place a printer on a shard"""
+    return printer.get('serial') or f"id:{printer['id']}"
+
+
+def shard_for_printer(printer):
+    """Return the shard node that owns a printer"""
+    key = printer_shard_key(printer)
+    best_node = None
+    best_weight = None
+    for node in SHARD_NODES:
+        weight = hashlib.sha1(f"{node}|{key}".encode()).digest()
+        if best_weight is None or weight > best_weight:
+            best_node = node
+            best_weight = weight
+    return best_node
+
+
+def owns_printer(printer):
+    """Check whether this instance should hold the MQTT session for a printer"""
+    if not sharding_enabled():
+        return True
+    return shard_for_printer(printer) == SHARD_SELF
+
+
+def _fetch_json(node, path):
+    """GET a JSON document from a shard"""
+    started = time.time()
+    try:
+        with urllib.request.urlopen(node + path, timeout=SHARD_TIMEOUT) as resp:
+            data = json.loads(resp.read())
+        return {'node': node, 'ok': True, 'data': data, 'error': None,
+                'latency_ms': int((time.time() - started) * 1000)}
+    except Exception as e:
+        return {'node': node, 'ok': False, 'data': None, 'error': str(e),
+                'latency_ms': int((time.time() - started) * 1000)}
+
+
+def fan_out(path):
+    """GET path from every shard concurrently, returning one result per node"""
+    return list(_executor.map(lambda node: _fetch_json(node, path), SHARD_NODES))
@@ -4,13 +4,22 @@ Status API for Bambu Farm Monitor
 Connects to Bambu printers via MQTT to retrieve real-time status
 """
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 import json
 import ssl
 import paho.mqtt.client as mqtt
 import threading
 import time
+import bisect
+import itertools
+import os
+import atexit
+import signal
+import sys
+import printer_config
+import sharding
+import stream_health
 
 app = Flask(__name__)
 CORS(app)
@@ -18,18 +27,343 @@ CORS(app)
 # Store printer status in memory
 printer_status = {}
 mqtt_clients = {}
+mqtt_client_settings = {}  # printer_id -> (ip, access_code, serial) the client was created with
+mqtt_lock = threading.RLock()  # Serializes connect/disconnect so overlapping reconnects can't leak clients
 raw_mqtt_messages = {}  # Store last raw message for debugging
 
-CONFIG_FILE = '/app/config/printers.json'
+# Farm summary index, maintained incrementally by the MQTT callbacks so
+# /api/status/summary never has to walk every printer
+FARM_STATES = ['printing', 'idle', 'paused', 'failed', 'offline']
+ATTENTION_STATES = ['paused', 'failed', 'offline']
+SUMMARY_JOB_LIMIT = 10
+farm_counts = {state: 0 for state in FARM_STATES}
+printer_farm_state = {}  # printer_id -> current bucket in farm_counts
+printer_eta = {}         # printer_id -> ((eta_epoch, printer_id), minutes remaining)
+eta_index = []           # Sorted (eta_epoch, printer_id) for printing printers
+attention_printers = {}  # printer_id -> reason
+farm_state_members = {state: set() for state in FARM_STATES}  # state -> printer ids
+farm_index_lock = threading.Lock()
+
+# Warm-start snapshot of last-known printer state
+SNAPSHOT_FILE = os.environ.get('STATUS_SNAPSHOT_FILE', '/app/config/status_snapshot.json')
+SNAPSHOT_INTERVAL = int(os.environ.get('STATUS_SNAPSHOT_INTERVAL', '30'))
+warm_snapshot = {}       # printer_id -> status loaded from disk, consumed on first connect
+status_version = 0       # Bumped on every status change so unchanged state isn't rewritten
+snapshot_lock = threading.Lock()
+
+# Camera stream health from go2rtc, folded into each printer's status
+CAMERA_HEALTH_INTERVAL = float(os.environ.get('CAMERA_HEALTH_INTERVAL', '10'))
+camera_health_error = {'error': None}
+
+# Commands published to printers, matched to replies by sequence_id
+COMMAND_TIMEOUT = 5
+MAX_COMMAND_TIMEOUT = 30
+command_sequence = itertools.count(int(time.time()))
+pending_commands = {}    # (printer_id, sequence_id) -> {'event', 'sent_at', 'reply'}
+pending_commands_lock = threading.Lock()
 
 def load_config():
     """Load printer configuration"""
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
+        return printer_config.load_config()
     except:
         return {"printers": []}
 
+def classify_farm_state(status):
+    """Map a printer status entry onto one of FARM_STATES"""
+    if not status.get('connected'):
+        return 'offline'
+
+    gcode_state = str(status.get('print_status', '')).upper()
+    if gcode_state in ['RUNNING', 'PREPARE', 'SLICING']:
+        return 'printing'
+    if gcode_state == 'PAUSE':
+        return 'paused'
+    if gcode_state == 'FAILED':
+        return 'failed'
+    return 'idle'
+
+def update_farm_index(printer_id):
+    """Refresh summary aggregates and ETA index for one printer"""
+    global status_version
+    status_version += 1
+
+    status = printer_status.get(printer_id)
+    if status is None:
+        return
+
+    new_state = classify_farm_state(status)
+
+    with farm_index_lock:
+        old_state = printer_farm_state.get(printer_id)
+        if old_state != new_state:
+            if old_state is not None:
+                farm_counts[old_state] -= 1
+                farm_state_members[old_state].discard(printer_id)
+            farm_counts[new_state] += 1
+            farm_state_members[new_state].add(printer_id)
+            printer_farm_state[printer_id] = new_state
+
+        if new_state in ATTENTION_STATES:
+            attention_printers[printer_id] = new_state
+        else:
+            attention_printers.pop(printer_id, None)
+
+        # Re-slot the printer in the ETA index only when its remaining time moves.
+        # Warm-start entries stay out until MQTT confirms the job: their remaining
+        # time was recorded at snapshot time, not now
+        remaining = int(status.get('print_time_remaining', 0) or 0)
+        if new_state != 'printing' or remaining <= 0 or status.get('stale'):
+            remaining = None
+
+        old_entry, old_remaining = printer_eta.get(printer_id, (None, None))
+        if old_remaining == remaining:
+            return
+        if old_entry is not None:
+            pos = bisect.bisect_left(eta_index, old_entry)
+            if pos < len(eta_index) and eta_index[pos] == old_entry:
+                eta_index.pop(pos)
+            del printer_eta[printer_id]
+        if remaining is not None:
+            new_entry = (int(time.time()) + remaining * 60, printer_id)
+            bisect.insort(eta_index, new_entry)
+            printer_eta[printer_id] = (new_entry, remaining)
+
+def remove_from_farm_index(printer_id):
+    """Drop one printer from summary aggregates and the ETA index"""
+    global status_version
+    status_version += 1
+
+    with farm_index_lock:
+        old_state = printer_farm_state.pop(printer_id, None)
+        if old_state is not None:
+            farm_counts[old_state] -= 1
+            farm_state_members[old_state].discard(printer_id)
+        attention_printers.pop(printer_id, None)
+
+        old_entry, _ = printer_eta.pop(printer_id, (None, None))
+        if old_entry is not None:
+            pos = bisect.bisect_left(eta_index, old_entry)
+            if pos < len(eta_index) and eta_index[pos] == old_entry:
+                eta_index.pop(pos)
+
+def reset_farm_index():
+    """Clear summary aggregates (used when all MQTT clients are rebuilt)"""
+    with farm_index_lock:
+        for state in FARM_STATES:
+            farm_counts[state] = 0
+            farm_state_members[state].clear()
+        printer_farm_state.clear()
+        printer_eta.clear()
+        eta_index.clear()
+        attention_printers.clear()
+
+def save_snapshot():
+    """Atomically write last-known printer state to SNAPSHOT_FILE"""
+    with snapshot_lock:
+        snapshot = {
+            'saved_at': int(time.time()),
+            'printers': {pid: dict(status) for pid, status in list(printer_status.items())}
+        }
+        tmp_path = SNAPSHOT_FILE + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(SNAPSHOT_FILE), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, SNAPSHOT_FILE)
+        except Exception as e:
+            print(f"Error saving status snapshot: {e}")
+
+def snapshot_loop():
+    """Periodically save the snapshot when printer state has changed"""
+    last_saved = status_version
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        if status_version != last_saved:
+            last_saved = status_version
+            save_snapshot()
+
+def load_snapshot():
+    """Load the last snapshot and seed printer_status with stale entries"""
+    try:
+        with open(SNAPSHOT_FILE, 'r') as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"Error loading status snapshot: {e}")
+        return
+
+    for pid, status in snapshot.get('printers', {}).items():
+        try:
+            warm_snapshot[int(pid)] = status
+        except ValueError:
+            continue
+    print(f"Loaded status snapshot for {len(warm_snapshot)} printers")
+
+    for printer in load_config().get('printers', []):
+        if sharding.owns_printer(printer):
+            printer_status[printer['id']] = initial_status(printer)
+            update_farm_index(printer['id'])
+
+def start_snapshots():
+    """Start the background snapshot writer and save once more at shutdown"""
+    threading.Thread(target=snapshot_loop, daemon=True).start()
+    atexit.register(save_snapshot)
+
+def update_camera_health():
+    """Poll go2rtc once and store stream health under each printer's 'camera' key"""
+    try:
+        streams = stream_health.poll()
+    except Exception as e:
+        if camera_health_error['error'] != str(e):
+            print(f"Error polling go2rtc streams: {e}")
+        camera_health_error['error'] = str(e)
+        return
+    camera_health_error['error'] = None
+
+    for name, health in streams.items():
+        if not name.startswith('printer'):
+            continue
+        try:
+            printer_id = int(name[len('printer'):])
+        except ValueError:
+            continue
+        if printer_id in printer_status:
+            printer_status[printer_id]['camera'] = health
+
+def camera_health_loop():
+    """Poll go2rtc stream health every CAMERA_HEALTH_INTERVAL seconds"""
+    while True:
+        update_camera_health()
+        time.sleep(CAMERA_HEALTH_INTERVAL)
+
+def start_camera_health():
+    """Start the background go2rtc poller (disabled when the interval is 0)"""
+    if CAMERA_HEALTH_INTERVAL > 0:
+        threading.Thread(target=camera_health_loop, daemon=True).start()
+
+def build_command(command, sequence_id):
+    """Build the MQTT request payload for a farm command (None if unknown)"""
+    if command in ['pause', 'resume', 'stop']:
+        return {"print": {"sequence_id": sequence_id, "command": command, "param": ""}}
+    if command in ['light_on', 'light_off']:
+        return {"system": {
+            "sequence_id": sequence_id,
+            "command": "ledctrl",
+            "led_node": "chamber_light",
+            "led_mode": "on" if command == 'light_on' else "off",
+            "led_on_time": 500,
+            "led_off_time": 500,
+            "loop_times": 0,
+            "interval_time": 0
+        }}
+    if command == 'pushall':
+        return {"pushing": {"sequence_id": sequence_id, "command": "pushall"}}
+    return None
+
+def match_command_reply(printer_id, data):
+    """Resolve a pending command if this report carries its sequence_id"""
+    if not isinstance(data, dict) or not pending_commands:
+        return
+
+    for section in data.values():
+        if not isinstance(section, dict) or 'sequence_id' not in section:
+            continue
+        key = (printer_id, str(section['sequence_id']))
+        with pending_commands_lock:
+            pending = pending_commands.get(key)
+            if pending and pending['reply'] is None:
+                pending['reply'] = section
+                pending['replied_at'] = time.time()
+                pending['event'].set()
+
+def send_command(printer_ids, command, timeout):
+    """Publish a command to several printers at once and wait for their replies"""
+    results = {}
+    sent = []
+
+    for printer_id in printer_ids:
+        client = mqtt_clients.get(printer_id)
+        status = printer_status.get(printer_id, {})
+        serial = status.get('serial', '')
+        if not client or not status.get('connected'):
+            results[printer_id] = {"success": False, "acked": False, "error": "Printer not connected"}
+            continue
+        if not serial:
+            results[printer_id] = {"success": False, "acked": False, "error": "Printer serial number required to send commands"}
+            continue
+
+        sequence_id = str(next(command_sequence))
+        pending = {'event': threading.Event(), 'sent_at': time.time(), 'reply': None}
+        with pending_commands_lock:
+            pending_commands[(printer_id, sequence_id)] = pending
+
+        info = client.publish(f"device/{serial}/request", json.dumps(build_command(command, sequence_id)))
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            results[printer_id] = {"success": False, "acked": False, "error": f"Publish failed with code {info.rc}"}
+            with pending_commands_lock:
+                pending_commands.pop((printer_id, sequence_id), None)
+            continue
+        sent.append((printer_id, sequence_id, pending))
+
+    # All commands are in flight; wait on them against one shared deadline
+    deadline = time.time() + timeout
+    for printer_id, sequence_id, pending in sent:
+        pending['event'].wait(max(0, deadline - time.time()))
+        with pending_commands_lock:
+            pending_commands.pop((printer_id, sequence_id), None)
+
+        reply = pending['reply']
+        if reply is None:
+            results[printer_id] = {"success": False, "acked": False, "sequence_id": sequence_id,
+                                   "error": "No acknowledgement before timeout"}
+            continue
+
+        result = str(reply.get('result', 'success')).lower()
+        results[printer_id] = {
+            "success": result == 'success',
+            "acked": True,
+            "sequence_id": sequence_id,
+            "result": reply.get('result'),
+            "reason": reply.get('reason'),
+            "latency_ms": int((pending['replied_at'] - pending['sent_at']) * 1000)
+        }
+
+    return results
+
+def parse_field_selection(fields):
+    """Parse a ?fields= value like 'bed_temp,ams.trays.color' into a nested dict"""
+    selection = {}
+    for path in fields.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = selection
+        parts = path.split('.')
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None  # Leaf selects the whole value
+            elif node.get(part, {}) is None:
+                break  # Parent already selected in full
+            else:
+                node = node.setdefault(part, {})
+    return selection
+
+def project_fields(value, selection):
+    """Apply a parsed field selection to a status value, descending through lists"""
+    if selection is None:
+        return value
+    if isinstance(value, list):
+        return [project_fields(item, selection) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: project_fields(value[key], sub)
+            for key, sub in selection.items()
+            if key in value
+        }
+    return value
+
 def parse_bambu_status(payload):
     """Parse Bambu printer MQTT status message"""
     try:
@@ -181,6 +515,8 @@ def on_connect(client, userdata, flags, rc):
         print(f"Printer {printer_id} MQTT connection failed: {rc}")
         printer_status[printer_id]['connected'] = False
 
+    update_farm_index(printer_id)
+
 def on_message(client, userdata, msg):
     """MQTT message callback"""
     printer_id = userdata['printer_id']
@@ -189,6 +525,7 @@ def on_message(client, userdata, msg):
     # Store raw message for debugging
     try:
         raw_mqtt_messages[printer_id] = json.loads(msg.payload)
+        match_command_reply(printer_id, raw_mqtt_messages[printer_id])
     except:
         pass
 
@@ -224,6 +561,7 @@ def on_message(client, userdata, msg):
             printer_status[printer_id]['nozzle_target'] = status['nozzle_target']
             printer_status[printer_id]['bed_target'] = status['bed_target']
             printer_status[printer_id]['fan_speed'] = status['fan_speed']
+            printer_status[printer_id]['stale'] = False
         elif new_is_clearly_idle and not current_printing:
             # Was idle, still idle, update to confirm
             printer_status[printer_id]['printing'] = False
@@ -233,8 +571,11 @@ def on_message(client, userdata, msg):
             printer_status[printer_id]['print_total_layers'] = 0
             printer_status[printer_id]['print_time_remaining'] = 0
             printer_status[printer_id]['print_status'] = 'idle'
+            printer_status[printer_id]['stale'] = False
         # else: keep cached print data if new message doesn't have complete info
 
+        update_farm_index(printer_id)
+
 def on_disconnect(client, userdata, rc):
     """MQTT disconnect callback"""
     printer_id = userdata['printer_id']
@@ -245,17 +586,16 @@ def on_disconnect(client, userdata, rc):
             client.reconnect()
         except:
             pass
-    printer_status[printer_id]['connected'] = False
+    if printer_id in printer_status:
+        printer_status[printer_id]['connected'] = False
+        update_farm_index(printer_id)
 
-def connect_printer_mqtt(printer):
-    """Connect to a printer's MQTT broker"""
-    printer_id = printer['id']
-    ip = printer['ip']
-    access_code = printer['access_code']
+def initial_status(printer):
+    """Build a printer's starting status, from the warm-start snapshot if available"""
     serial = printer.get('serial', '')
+    ip = printer['ip']
 
-    # Initialize status
-    printer_status[printer_id] = {
+    status = {
         'connected': False,
         'printing': False,
         'bed_temp': 0,
@@ -280,6 +620,27 @@ def connect_printer_mqtt(printer):
         }
     }
 
+    # Reuse last-known state only if it was recorded for the same printer
+    cached = warm_snapshot.pop(printer['id'], None)
+    if cached and cached.get('serial', '') == serial and cached.get('ip') == ip:
+        status.update(cached)
+        status['connected'] = False
+        status['stale'] = True
+
+    return status
+
+def connect_printer_mqtt(printer):
+    """Connect to a printer's MQTT broker"""
+    printer_id = printer['id']
+    ip = printer['ip']
+    access_code = printer['access_code']
+    serial = printer.get('serial', '')
+
+    # Initialize status, keeping a stale warm-start entry until MQTT replaces it
+    if not printer_status.get(printer_id, {}).get('stale'):
+        printer_status[printer_id] = initial_status(printer)
+    update_farm_index(printer_id)
+
     try:
         # Create MQTT client
         client = mqtt.Client(userdata={'printer_id': printer_id, 'serial': serial})
@@ -303,31 +664,293 @@ def connect_printer_mqtt(printer):
         client.loop_start()
 
         mqtt_clients[printer_id] = client
+        mqtt_client_settings[printer_id] = mqtt_settings(printer)
         print(f"Started MQTT client for printer {printer_id}")
 
     except Exception as e:
         print(f"Error connecting to printer {printer_id}: {e}")
 
+def mqtt_settings(printer):
+    """Connection settings that need a new MQTT client when they change"""
+    return (printer['ip'], printer['access_code'], printer.get('serial', ''))
+
+def disconnect_printer_mqtt(printer_id):
+    """Stop a printer's MQTT client and drop its status"""
+    client = mqtt_clients.pop(printer_id, None)
+    mqtt_client_settings.pop(printer_id, None)
+    if client:
+        try:
+            client.disconnect()
+            client.loop_stop()
+        except:
+            pass
+    printer_status.pop(printer_id, None)
+    remove_from_farm_index(printer_id)
+
 def initialize_mqtt_connections():
-    """Initialize MQTT connections to all printers"""
-    config = load_config()
+    """Connect to owned printers, only touching printers added, removed or changed since the last call"""
+    with mqtt_lock:
+        wanted = {p['id']: p for p in load_config().get('printers', []) if sharding.owns_printer(p)}
+
+        for printer_id in set(mqtt_clients) | set(printer_status):
+            printer = wanted.get(printer_id)
+            if printer is None or (printer_id in mqtt_clients and mqtt_client_settings.get(printer_id) != mqtt_settings(printer)):
+                disconnect_printer_mqtt(printer_id)
+
+        for printer_id, printer in wanted.items():
+            if printer_id not in mqtt_clients:
+                connect_printer_mqtt(printer)
+
+def parse_status_filters(args):
+    """Validate ids/state query parameters, returning (ids, states, error response)"""
+    ids = None
+    ids_param = args.get('ids')
+    if ids_param:
+        try:
+            ids = [int(i) for i in ids_param.split(',') if i.strip()]
+        except ValueError:
+            return None, None, (jsonify({"error": "ids must be a comma-separated list of integers"}), 400)
+
+    states = [s.strip() for s in args.get('state', '').split(',') if s.strip()]
+    invalid = [s for s in states if s not in FARM_STATES]
+    if invalid:
+        return None, None, (jsonify({"error": f"Unknown state: {', '.join(invalid)}"}), 400)
+
+    return ids, states, None
 
-    for printer in config.get('printers', []):
-        connect_printer_mqtt(printer)
+def filter_printer_status(args):
+    """Apply ids/state/group/tag filters and fields projection, returning (result, error response)"""
+    ids, states, error = parse_status_filters(args)
+    if error:
+        return None, error
+
+    selected = set(ids) if ids is not None else None
+
+    if states:
+        with farm_index_lock:
+            matched = set().union(*(farm_state_members[s] for s in states))
+        selected = matched if selected is None else selected & matched
+
+    group_param = args.get('group')
+    tag_param = args.get('tag')
+    if group_param or tag_param:
+        try:
+            matched = set(printer_config.resolve_printer_ids(group=group_param, tag=tag_param))
+        except Exception as e:
+            return None, (jsonify({"error": f"Unable to read printer configuration: {e}"}), 500)
+        selected = matched if selected is None else selected & matched
+
+    if selected is None:
+        result = dict(printer_status)
+    else:
+        result = {pid: printer_status[pid] for pid in selected if pid in printer_status}
+
+    fields_param = args.get('fields')
+    if fields_param:
+        selection = parse_field_selection(fields_param)
+        result = {pid: project_fields(status, selection) for pid, status in result.items()}
+
+    return result, None
 
 @app.route('/api/status/printers', methods=['GET'])
 def get_all_status():
-    """Get status for all printers"""
-    return jsonify(printer_status)
+    """Get status for all printers, optionally filtered and projected
+
+    Query parameters:
+        ids    - comma-separated printer IDs
+        state  - comma-separated farm states (printing, idle, paused, failed, offline)
+        group  - printer group name from printers.json
+        tag    - printer tag from printers.json
+        fields - comma-separated fields to return, dotted for nested (ams.trays.color)
+    """
+    result, error = filter_printer_status(request.args)
+    if error:
+        return error
+    return jsonify(result)
+
+def build_farm_summary():
+    """Farm overview: state counts, next jobs by ETA, printers needing attention"""
+    now = int(time.time())
+
+    with farm_index_lock:
+        counts = dict(farm_counts)
+        next_entries = eta_index[:SUMMARY_JOB_LIMIT]
+        attention = sorted(attention_printers.items())
+
+    next_jobs = []
+    for eta, printer_id in next_entries:
+        status = printer_status.get(printer_id, {})
+        next_jobs.append({
+            'printer_id': printer_id,
+            'print_file': status.get('print_file', ''),
+            'print_progress': status.get('print_progress', 0),
+            'eta': eta,
+            'time_remaining': max(0, (eta - now) // 60)
+        })
+
+    return {
+        'total': sum(counts.values()),
+        'counts': counts,
+        'next_jobs': next_jobs,
+        'attention': [{'printer_id': pid, 'reason': reason} for pid, reason in attention],
+        'timestamp': now
+    }
+
+@app.route('/api/status/summary', methods=['GET'])
+def get_farm_summary():
+    """Get farm overview: state counts, next jobs by ETA, printers needing attention"""
+    return jsonify(build_farm_summary())
+
+def local_shard(printers):
+    """Shard report for an unsharded instance, so cluster endpoints keep one response shape"""
+    return {sharding.SHARD_SELF or 'local': {"ok": True, "error": None, "latency_ms": 0, "printers": printers}}
+
+@app.route('/api/status/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for farm state and camera stream health"""
+    lines = [
+        '# HELP bambu_printers Printers by farm state',
+        '# TYPE bambu_printers gauge'
+    ]
+    with farm_index_lock:
+        counts = dict(farm_counts)
+    for state, count in counts.items():
+        lines.append(f'bambu_printers{{state="{state}"}} {count}')
+
+    camera_metrics = [
+        ('bambu_camera_producer_up', 'gauge', 'Camera stream producer running', 'producer_up'),
+        ('bambu_camera_consumers', 'gauge', 'Camera stream consumers', 'consumers'),
+        ('bambu_camera_bytes_received_total', 'counter', 'Bytes received from the camera process', 'bytes_recv'),
+        ('bambu_camera_bytes_per_second', 'gauge', 'Camera stream receive rate', 'bytes_per_sec'),
+        ('bambu_camera_restarts_total', 'counter', 'Camera process restarts while in use', 'restarts'),
+        ('bambu_camera_stalled', 'gauge', 'Camera stream has consumers but receives no data', 'stalled')
+    ]
+    cameras = {pid: status['camera'] for pid, status in list(printer_status.items()) if 'camera' in status}
+    for metric, metric_type, help_text, key in camera_metrics:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {metric_type}')
+        for pid in sorted(cameras):
+            lines.append(f'{metric}{{printer="{pid}"}} {int(cameras[pid][key])}')
+
+    lines.append('# HELP bambu_camera_health_up go2rtc stream API reachable')
+    lines.append('# TYPE bambu_camera_health_up gauge')
+    lines.append(f"bambu_camera_health_up {0 if camera_health_error['error'] else 1}")
+
+    return '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4'}
 
 @app.route('/api/status/printers/<int:printer_id>', methods=['GET'])
 def get_printer_status(printer_id):
     """Get status for a specific printer"""
     if printer_id in printer_status:
-        return jsonify(printer_status[printer_id])
+        status = printer_status[printer_id]
+        fields_param = request.args.get('fields')
+        if fields_param:
+            status = project_fields(status, parse_field_selection(fields_param))
+        return jsonify(status)
     else:
         return jsonify({"error": "Printer not found"}), 404
 
+def owned_printer_ids(node):
+    """Printer IDs from config that a shard node is responsible for"""
+    return [
+        p['id'] for p in load_config().get('printers', [])
+        if sharding.shard_for_printer(p) == node
+    ]
+
+@app.route('/api/status/shard', methods=['GET'])
+def get_shard_info():
+    """Get this instance's shard assignment"""
+    return jsonify({
+        "sharded": sharding.sharding_enabled(),
+        "self": sharding.SHARD_SELF,
+        "nodes": sharding.SHARD_NODES,
+        "printers": sorted(printer_status.keys())
+    })
+
+@app.route('/api/status/cluster/printers', methods=['GET'])
+def get_cluster_status():
+    """Get merged printer status from every shard (accepts the same filters as /api/status/printers)"""
+    # Reject bad filters here rather than letting every shard answer 400 and look down
+    ids, states, error = parse_status_filters(request.args)
+    if error:
+        return error
+
+    if not sharding.sharding_enabled():
+        printers, error = filter_printer_status(request.args)
+        if error:
+            return error
+        return jsonify({"printers": printers, "shards": local_shard(len(printers))})
+
+    query = request.query_string.decode()
+    results = sharding.fan_out('/api/status/printers' + (f'?{query}' if query else ''))
+
+    # Printers on an unreachable shard are reported offline unless a filter excludes them
+    include_unavailable = not states or 'offline' in states
+    try:
+        wanted = set(printer_config.resolve_printer_ids(
+            ids=ids, group=request.args.get('group'), tag=request.args.get('tag')
+        ))
+    except Exception as e:
+        return jsonify({"error": f"Unable to read printer configuration: {e}"}), 500
+    selection = parse_field_selection(request.args.get('fields', ''))
+
+    printers = {}
+    shards = {}
+    for result in results:
+        node = result['node']
+        shards[node] = {"ok": result['ok'], "error": result['error'], "latency_ms": result['latency_ms']}
+        if result['ok'] and isinstance(result['data'], dict):
+            printers.update(result['data'])
+            shards[node]['printers'] = len(result['data'])
+        elif include_unavailable:
+            for pid in owned_printer_ids(node):
+                if pid in wanted:
+                    placeholder = {'connected': False, 'shard_unavailable': True, 'shard': node}
+                    if selection:
+                        placeholder = project_fields(placeholder, selection)
+                    printers[str(pid)] = placeholder
+
+    return jsonify({"printers": printers, "shards": shards})
+
+@app.route('/api/status/cluster/summary', methods=['GET'])
+def get_cluster_summary():
+    """Get a farm summary merged from every shard"""
+    if not sharding.sharding_enabled():
+        summary = build_farm_summary()
+        summary['shards'] = local_shard(summary['total'])
+        return jsonify(summary)
+
+    counts = {state: 0 for state in FARM_STATES}
+    next_jobs = []
+    attention = []
+    shards = {}
+
+    for result in sharding.fan_out('/api/status/summary'):
+        node = result['node']
+        shards[node] = {"ok": result['ok'], "error": result['error'], "latency_ms": result['latency_ms']}
+        if result['ok'] and isinstance(result['data'], dict):
+            data = result['data']
+            for state, count in data.get('counts', {}).items():
+                counts[state] = counts.get(state, 0) + count
+            next_jobs.extend(data.get('next_jobs', []))
+            attention.extend(data.get('attention', []))
+        else:
+            for pid in owned_printer_ids(node):
+                counts['offline'] += 1
+                attention.append({'printer_id': pid, 'reason': 'shard_unavailable'})
+
+    next_jobs.sort(key=lambda job: (job['eta'], job['printer_id']))
+    attention.sort(key=lambda item: item['printer_id'])
+
+    return jsonify({
+        'total': sum(counts.values()),
+        'counts': counts,
+        'next_jobs': next_jobs[:SUMMARY_JOB_LIMIT],
+        'attention': attention,
+        'shards': shards,
+        'timestamp': int(time.time())
+    })
+
 @app.route('/api/status/raw/<int:printer_id>', methods=['GET'])
 def get_raw_mqtt(printer_id):
     """Get raw MQTT message for debugging"""
@@ -341,26 +964,71 @@ def health_check():
     """Health check endpoint"""
     return jsonify({"status": "ok", "mqtt_clients": len(mqtt_clients)})
 
+def reconnect_all():
+    """Drop all MQTT clients and reconnect from the current configuration"""
+    with mqtt_lock:
+        # Disconnect all existing clients
+        for printer_id in list(mqtt_clients):
+            disconnect_printer_mqtt(printer_id)
+
+        printer_status.clear()
+        reset_farm_index()
+
+        # Reinitialize connections
+        initialize_mqtt_connections()
+
 @app.route('/api/status/reconnect', methods=['POST'])
 def reconnect_mqtt():
-    """Reconnect all MQTT clients"""
-    global mqtt_clients, printer_status
+    """Reconnect printers whose configuration changed (?full=1 drops and reconnects every client)"""
+    if request.args.get('full') == '1':
+        reconnect_all()
+    else:
+        initialize_mqtt_connections()
 
-    # Disconnect all existing clients
-    for client in mqtt_clients.values():
-        try:
-            client.loop_stop()
-            client.disconnect()
-        except:
-            pass
+    return jsonify({"status": "ok", "mqtt_clients": len(mqtt_clients)})
 
-    mqtt_clients.clear()
-    printer_status.clear()
+@app.route('/api/status/command', methods=['POST'])
+def post_command():
+    """Send a command to a list or group of printers and collect their acknowledgements"""
+    data = request.json or {}
+    command = data.get('command', '')
+    if build_command(command, '0') is None:
+        return jsonify({"error": "Unknown command. Use pause, resume, stop, light_on, light_off or pushall"}), 400
 
-    # Reinitialize connections
-    initialize_mqtt_connections()
+    ids = data.get('printer_ids')
+    if ids is not None and not isinstance(ids, list):
+        return jsonify({"error": "printer_ids must be a list"}), 400
+    if ids is None and not data.get('group') and not data.get('tag'):
+        return jsonify({"error": "Specify printer_ids, group or tag"}), 400
 
-    return jsonify({"status": "ok", "mqtt_clients": len(mqtt_clients)})
+    try:
+        timeout = float(data.get('timeout', COMMAND_TIMEOUT))
+        ids = [int(i) for i in ids] if ids is not None else None
+        printer_ids = printer_config.resolve_printer_ids(ids=ids, group=data.get('group'), tag=data.get('tag'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "printer_ids must be integers and timeout a number"}), 400
+
+    # Comparisons with NaN are always false, so this rejects it too
+    if not 0 < timeout <= MAX_COMMAND_TIMEOUT:
+        return jsonify({"error": f"timeout must be greater than 0 and at most {MAX_COMMAND_TIMEOUT} seconds"}), 400
+
+    if not printer_ids:
+        return jsonify({"error": "No matching printers"}), 404
+
+    results = send_command(printer_ids, command, timeout)
+
+    # Report requested IDs that aren't configured instead of dropping them
+    for printer_id in sorted(set(ids or [])):
+        if printer_config.get_printer(printer_id) is None:
+            results[printer_id] = {"success": False, "acked": False, "error": "Printer not found"}
+
+    return jsonify({
+        "command": command,
+        "results": results,
+        "printers": len(results),
+        "acked": sum(1 for r in results.values() if r['acked']),
+        "succeeded": sum(1 for r in results.values() if r['success'])
+    })
 
 @app.route('/api/status/test', methods=['GET'])
 def test_status():
@@ -454,14 +1122,10 @@ def test_status():
 @app.route('/api/status/mqtt-test/<int:printer_id>', methods=['POST'])
 def test_mqtt_connection(printer_id):
     """Test MQTT connection to a specific printer"""
-    config = load_config()
-
-    # Find printer config
-    printer = None
-    for p in config.get('printers', []):
-        if p['id'] == printer_id:
-            printer = p
-            break
+    try:
+        printer = printer_config.get_printer(printer_id)
+    except:
+        printer = None
 
     if not printer:
         return jsonify({"success": False, "error": "Printer not found"}), 404
@@ -556,7 +1220,13 @@ def test_mqtt_connection(printer_id):
     return jsonify(test_result)
 
 if __name__ == '__main__':
-    # Initialize MQTT connections
-    initialize_mqtt_connections()
+    # Serve last-known state straight away, then connect to printers in the background
+    load_snapshot()
+    start_snapshots()
+    start_camera_health()
+    threading.Thread(target=initialize_mqtt_connections, daemon=True).start()
+
+    # supervisord stops us with SIGTERM; exit normally so the final snapshot is written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
-    app.run(host='0.0.0.0', port=5001, debug=False)
+    app.run(host='0.0.0.0', port=int(os.environ.get('STATUS_API_PORT', '5001')), debug=False)
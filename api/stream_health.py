@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Camera stream health for Bambu Farm Monitor
+Polls go2rtc's /api/streams over a persistent keep-alive connection and
+tracks per-stream producer state, consumers, byte rates and restarts
+"""
+
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+GO2RTC_URL = os.environ.get('GO2RTC_URL', 'http://127.0.0.1:1984').rstrip('/')
+HEALTH_TIMEOUT = float(os.environ.get('CAMERA_HEALTH_TIMEOUT', '5'))
+
+_conn = None
+_conn_lock = threading.Lock()
+_previous = {}  # stream name -> last health entry, for deltas
+
+
+def _get_connection():
+    """Return the shared keep-alive connection to go2rtc"""
+    global _conn
+    if _conn is None:
+        parsed = urllib.parse.urlparse(GO2RTC_URL)
+        conn_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        _conn = conn_class(parsed.hostname, parsed.port, timeout=HEALTH_TIMEOUT)
+    return _conn
+
+
+def fetch_streams():
+    """GET /api/streams from go2rtc, reconnecting once if the kept-alive socket was closed"""
+    global _conn
+    with _conn_lock:
+        for attempt in range(2):
+            conn = _get_connection()
+            try:
+                conn.request('GET', '/api/streams')
+                resp = conn.getresponse()
+                body = resp.read()
+                if resp.status != 200:
+                    raise RuntimeError(f"go2rtc returned HTTP {resp.status}")
+                return json.loads(body)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                _conn = None
+                if attempt == 1:
+                    raise
+
+
+def summarize_stream(name, stream, now):
+    """Reduce a go2rtc stream entry to health fields, with deltas from the last poll"""
+    producers = (stream or {}).get('producers') or []
+    consumers = (stream or {}).get('consumers') or []
+
+    # go2rtc only reports traffic counters for producers that are actually running
+    running = [p for p in producers if isinstance(p, dict) and 'bytes_recv' in p]
+    bytes_recv = sum(p.get('bytes_recv', 0) for p in running)
+
+    previous = _previous.get(name)
+    bytes_per_sec = 0
+    restarts = previous['restarts'] if previous else 0
+    restarted = False
+    if previous:
+        elapsed = now - previous['checked_at']
+        if bytes_recv < previous['bytes_recv'] and consumers:
+            # Counter went backwards while still being watched: the stream process restarted
+            restarts += 1
+            restarted = True
+        elif elapsed > 0:
+            bytes_per_sec = int((bytes_recv - previous['bytes_recv']) / elapsed)
+
+    health = {
+        'producer_up': len(running) > 0,
+        'consumers': len(consumers),
+        'bytes_recv': bytes_recv,
+        'bytes_per_sec': bytes_per_sec,
+        'restarts': restarts,
+        'stalled': bool(previous) and not restarted and len(running) > 0 and len(consumers) > 0 and bytes_per_sec == 0,
+        'checked_at': now
+    }
+    _previous[name] = health
+    return health
+
+
+def poll():
+    """Poll go2rtc and return health per stream name"""
+    streams = fetch_streams()
+    now = time.time()
+    return {name: summarize_stream(name, stream, now) for name, stream in streams.items()}
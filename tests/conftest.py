@@ -0,0 +1,75 @@
+"""Shared fixtures for the API tests"""
+
+import json
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import printer_config  # noqa: E402
+
+
+@pytest.fixture
+def printers_json(tmp_path, monkeypatch):
+    """Point printer_config at a temporary printers.json with eight local printers"""
+    config_file = tmp_path / 'printers.json'
+    config_file.write_text(json.dumps({"printers": [
+        {"id": i, "name": f"P{i}", "ip": "127.0.0.1", "access_code": "12345678", "serial": f"SERIAL{i:04d}"}
+        for i in range(1, 9)
+    ]}))
+    monkeypatch.setattr(printer_config, 'CONFIG_FILE', str(config_file))
+    monkeypatch.setattr(printer_config, '_index', None)
+    return config_file
+
+
+class FakeMQTTClient:
+    """Stand-in for a paho client; publish() can answer through status_api.on_message"""
+
+    def __init__(self, printer_id, reply=None):
+        self.userdata = {'printer_id': printer_id, 'serial': f"SERIAL{printer_id:04d}"}
+        self.reply = reply  # request payload -> reply payload (or None for no answer)
+        self.published = []
+        self.subscribed = []
+        self.stopped = False
+
+    def subscribe(self, topic):
+        self.subscribed.append(topic)
+
+    def publish(self, topic, payload):
+        import status_api
+
+        request = json.loads(payload)
+        self.published.append((topic, request))
+        reply = self.reply(request) if self.reply else None
+        if reply is not None:
+            status_api.on_message(self, self.userdata, mqtt_message(self.userdata['serial'], reply))
+        return types.SimpleNamespace(rc=0)
+
+    def disconnect(self):
+        pass
+
+    def loop_stop(self):
+        self.stopped = True
+
+
+def mqtt_message(serial, data):
+    """An MQTT report message as paho hands it to on_message"""
+    return types.SimpleNamespace(topic=f"device/{serial}/report", payload=json.dumps(data).encode())
+
+
+@pytest.fixture
+def fresh_status(monkeypatch):
+    """Empty status_api state: printer status, farm index, MQTT clients and warm snapshot"""
+    import sharding
+    import status_api
+
+    for name in ('printer_status', 'mqtt_clients', 'mqtt_client_settings', 'raw_mqtt_messages',
+                 'warm_snapshot', 'pending_commands'):
+        monkeypatch.setattr(status_api, name, {})
+    monkeypatch.setattr(sharding, 'SHARD_NODES', [])
+    status_api.reset_farm_index()
+    yield status_api
+    status_api.reset_farm_index()
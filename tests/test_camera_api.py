@@ -0,0 +1,130 @@
+"""Camera frame cache: cache hits, ETags and single-flight grabs"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import camera_api
+
+
+@pytest.fixture
+def go2rtc(monkeypatch):
+    """Stand-in go2rtc serving a numbered JPEG per grab, optionally slowly"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), None)
+    state = {'grabs': 0, 'delay': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                state['grabs'] += 1
+                body = b'\xff\xd8frame' + str(state['grabs']).encode()
+            time.sleep(state['delay'])
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server.RequestHandlerClass = Handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(camera_api, 'GO2RTC_URL', f"http://127.0.0.1:{server.server_address[1]}")
+    for cache in (camera_api.frame_cache, camera_api.inflight, camera_api.last_requested, camera_api.fetch_errors):
+        cache.clear()
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(printers_json):
+    return camera_api.app.test_client()
+
+
+def test_frame_served_from_cache_within_ttl(go2rtc, client):
+    first = client.get('/api/camera/printers/1/frame.jpg')
+    second = client.get('/api/camera/printers/1/frame.jpg')
+
+    assert first.status_code == second.status_code == 200
+    assert first.mimetype == 'image/jpeg'
+    assert first.data == second.data == b'\xff\xd8frame1'
+    assert go2rtc['grabs'] == 1
+
+
+def test_frame_refreshed_after_ttl(go2rtc, client, monkeypatch):
+    client.get('/api/camera/printers/1/frame.jpg')
+    monkeypatch.setattr(camera_api, 'FRAME_TTL', 0)
+
+    resp = client.get('/api/camera/printers/1/frame.jpg')
+    assert resp.data == b'\xff\xd8frame2'
+    assert go2rtc['grabs'] == 2
+
+
+def test_etag_returns_not_modified(go2rtc, client):
+    first = client.get('/api/camera/printers/1/frame.jpg')
+    etag = first.headers['ETag']
+
+    resp = client.get('/api/camera/printers/1/frame.jpg', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.data == b''
+
+    resp = client.get('/api/camera/printers/1/frame.jpg', headers={'If-None-Match': '"other"'})
+    assert resp.status_code == 200
+
+
+def test_concurrent_requests_share_one_grab(go2rtc):
+    go2rtc['delay'] = 0.3
+    results = []
+
+    def fetch():
+        results.append(camera_api.get_frame(1))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert go2rtc['grabs'] == 1
+    assert len(results) == 8
+    assert all(entry['data'] == b'\xff\xd8frame1' for entry in results)
+
+
+def test_unknown_printer_not_grabbed(go2rtc, client):
+    resp = client.get('/api/camera/printers/99/frame.jpg')
+    assert resp.status_code == 404
+    assert go2rtc['grabs'] == 0
+
+
+def test_background_refresh_queues_each_printer_once(go2rtc, printers_json, monkeypatch):
+    go2rtc['delay'] = 0.2
+    camera_api.refresh_scheduled.clear()
+    now = time.time()
+    for pid in range(1, 9):
+        camera_api.last_requested[pid] = now
+
+    submitted = []
+    submit = camera_api.refresh_executor.submit
+    monkeypatch.setattr(camera_api.refresh_executor, 'submit', lambda fn, pid: submitted.append(pid) or submit(fn, pid))
+
+    # Ticks arriving faster than the grabs finish must not queue duplicates
+    for _ in range(5):
+        camera_api.schedule_refreshes()
+    assert sorted(submitted) == list(range(1, 9))
+
+    deadline = time.time() + 10
+    while camera_api.refresh_scheduled and time.time() < deadline:
+        time.sleep(0.05)
+    assert go2rtc['grabs'] == 8
+    assert sorted(camera_api.frame_cache) == list(range(1, 9))
+
+    # Fresh frames are not grabbed again, even if a refresh is requested
+    camera_api.schedule_refreshes()
+    camera_api.refresh_frame(1, camera_api.REFRESH_INTERVAL)
+    assert go2rtc['grabs'] == 8
@@ -0,0 +1,118 @@
+"""Farm command fan-out: sequence_id matching, shared timeout and per-printer results"""
+
+import time
+
+import pytest
+
+from conftest import FakeMQTTClient
+
+
+def ack(result='success', reason=None, sequence_offset=0):
+    """Reply function echoing the request section with a result, like the printer does"""
+    def reply(request):
+        section, body = next(iter(request.items()))
+        sequence_id = str(int(body['sequence_id']) + sequence_offset)
+        return {section: {**body, 'sequence_id': sequence_id, 'result': result, 'reason': reason}}
+    return reply
+
+
+@pytest.fixture
+def farm(printers_json, fresh_status):
+    """Printers 1-8 connected through fake clients; set .reply per printer to answer commands"""
+    status_api = fresh_status
+    clients = {}
+    for pid in range(1, 9):
+        printer = {'id': pid, 'ip': '127.0.0.1', 'access_code': '12345678', 'serial': f"SERIAL{pid:04d}"}
+        status_api.printer_status[pid] = status_api.initial_status(printer)
+        clients[pid] = status_api.mqtt_clients[pid] = FakeMQTTClient(pid)
+        status_api.on_connect(clients[pid], clients[pid].userdata, None, 0)
+    return clients
+
+
+def command(fresh_status, **body):
+    resp = fresh_status.app.test_client().post('/api/status/command', json=body)
+    return resp.status_code, resp.get_json()
+
+
+def test_acknowledged_command(farm, fresh_status):
+    farm[1].reply = ack()
+    farm[2].reply = ack(result='failed', reason='not printing')
+
+    code, data = command(fresh_status, command='pause', printer_ids=[1, 2], timeout=1)
+    assert code == 200
+    assert data['printers'] == 2 and data['acked'] == 2 and data['succeeded'] == 1
+
+    first = data['results']['1']
+    topic, request = farm[1].published[0]
+    assert topic == 'device/SERIAL0001/request'
+    assert request['print']['command'] == 'pause'
+    assert first['sequence_id'] == request['print']['sequence_id']
+    assert first['success'] is True and first['acked'] is True
+    second = data['results']['2']
+    assert (second['success'], second['acked'], second['result'], second['reason']) == \
+        (False, True, 'failed', 'not printing')
+    assert fresh_status.pending_commands == {}
+
+
+def test_reply_section_matches_command(farm, fresh_status):
+    farm[1].reply = ack()
+    _, data = command(fresh_status, command='light_on', printer_ids=[1])
+    assert farm[1].published[0][1]['system']['led_mode'] == 'on'
+    assert data['results']['1']['acked'] is True
+
+
+def test_silent_printers_share_one_deadline(farm, fresh_status):
+    farm[1].reply = ack()
+    started = time.time()
+
+    _, data = command(fresh_status, command='stop', printer_ids=[1, 2, 3, 4], timeout=0.3)
+    elapsed = time.time() - started
+
+    assert elapsed < 0.6  # one shared 0.3 s wait, not 0.3 s per printer
+    assert data['acked'] == 1
+    for pid in ('2', '3', '4'):
+        assert data['results'][pid]['acked'] is False
+        assert data['results'][pid]['error'] == 'No acknowledgement before timeout'
+    assert fresh_status.pending_commands == {}
+
+
+def test_reply_with_other_sequence_id_is_ignored(farm, fresh_status):
+    farm[1].reply = ack(sequence_offset=1)
+    _, data = command(fresh_status, command='pause', printer_ids=[1], timeout=0.2)
+    assert data['results']['1']['acked'] is False
+
+
+def test_disconnected_and_unknown_printers_reported(farm, fresh_status):
+    farm[1].reply = ack()
+    fresh_status.on_disconnect(farm[2], farm[2].userdata, 0)
+
+    code, data = command(fresh_status, command='pause', printer_ids=[1, 2, 99], timeout=0.5)
+    assert code == 200
+    assert data['printers'] == 3
+    assert data['results']['1']['acked'] is True
+    assert data['results']['2'] == {'success': False, 'acked': False, 'error': 'Printer not connected'}
+    assert data['results']['99'] == {'success': False, 'acked': False, 'error': 'Printer not found'}
+    assert farm[2].published == []
+
+
+def test_only_unknown_printers_is_404(farm, fresh_status):
+    code, _ = command(fresh_status, command='pause', printer_ids=[98, 99])
+    assert code == 404
+
+
+@pytest.mark.parametrize('timeout', [0, -1, 'nan', 'inf', 31, 'soon'])
+def test_invalid_timeout_rejected(farm, fresh_status, timeout):
+    code, _ = command(fresh_status, command='pause', printer_ids=[1], timeout=timeout)
+    assert code == 400
+    assert farm[1].published == []
+
+
+@pytest.mark.parametrize('body', [
+    {'command': 'explode', 'printer_ids': [1]},
+    {'command': 'pause'},
+    {'command': 'pause', 'printer_ids': 1},
+    {'command': 'pause', 'printer_ids': ['one']},
+])
+def test_invalid_requests_rejected(farm, fresh_status, body):
+    code, _ = command(fresh_status, **body)
+    assert code == 400
@@ -0,0 +1,87 @@
+"""Config writes: group/tag validation, duplicate serials and IPs, and atomic saves"""
+
+import io
+import json
+
+import pytest
+
+import config_api
+import printer_config
+
+
+@pytest.fixture
+def client(printers_json, monkeypatch):
+    monkeypatch.setattr(config_api, 'regenerate_go2rtc_config', lambda config: None)
+    monkeypatch.setattr(config_api, 'restart_go2rtc', lambda: True)
+    return config_api.app.test_client()
+
+
+def saved(printers_json):
+    return json.loads(printers_json.read_text())
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'group': ['Lab']}, 'group must be a string'),
+    ({'group': 3}, 'group must be a string'),
+    ({'tags': {'pla': True}}, 'tags must be a string or a list of strings'),
+    ({'tags': ['pla', 1]}, 'tags must be a string or a list of strings'),
+])
+def test_update_rejects_bad_group_or_tags(client, printers_json, body, error):
+    before = printers_json.read_text()
+
+    resp = client.put('/api/config/printers/1', json=body)
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == error
+    assert printers_json.read_text() == before
+    assert client.get('/api/config/printers').status_code == 200
+
+
+def test_update_accepts_group_and_tag_string(client, printers_json):
+    resp = client.put('/api/config/printers/1', json={'group': 'Lab', 'tags': 'pla, fast'})
+    assert resp.status_code == 200
+    assert saved(printers_json)['printers'][0]['tags'] == ['fast', 'pla']
+    assert client.get('/api/config/groups').get_json()['groups'] == {'Lab': [1]}
+
+
+def test_add_bulk_and_import_reject_bad_group(client, printers_json):
+    before = printers_json.read_text()
+
+    assert client.post('/api/config/printers', json={'ip': '10.0.0.9', 'group': ['Lab']}).status_code == 400
+    resp = client.post('/api/config/printers/bulk', json={'printers': [{'ip': '10.0.0.9', 'tags': [1]}]})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Printer 1: tags must be a string or a list of strings'
+
+    upload = json.dumps({'printers': [{'id': 1, 'name': 'a', 'ip': '10.0.0.9', 'access_code': 'x', 'group': {}}]})
+    resp = client.post('/api/config/import', data={'file': (io.BytesIO(upload.encode()), 'c.json')})
+    assert resp.status_code == 400
+    assert printers_json.read_text() == before
+
+
+def test_duplicate_serial_or_ip_rejected(client, printers_json):
+    assert client.put('/api/config/printers/1', json={'ip': '10.0.0.1'}).status_code == 200
+
+    resp = client.put('/api/config/printers/2', json={'ip': '10.0.0.1'})
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == 'Printers 2 and 1 have the same IP address: 10.0.0.1'
+
+    resp = client.post('/api/config/printers', json={'ip': '10.0.0.50', 'serial': 'SERIAL0003'})
+    assert resp.status_code == 400
+    assert 'same serial number' in resp.get_json()['error']
+
+    resp = client.post('/api/config/printers/bulk', json={'printers': [{'ip': '10.0.0.1'}, {'ip': '10.0.0.1'}]})
+    assert resp.status_code == 400
+    assert [p['ip'] for p in saved(printers_json)['printers'][:2]] == ['10.0.0.1', '127.0.0.1']
+
+    # Resending a printer's own values is not a conflict
+    assert client.put('/api/config/printers/2', json={'ip': '127.0.0.1', 'serial': 'SERIAL0002'}).status_code == 200
+
+
+def test_unindexable_config_is_never_written(printers_json):
+    before = printers_json.read_text()
+    config = printer_config.editable_index()['config']
+    config['printers'][0]['group'] = ['Lab']
+
+    with pytest.raises(TypeError):
+        printer_config.save_config(config)
+    assert printers_json.read_text() == before
+    assert len(printer_config.load_config()['printers']) == 8
@@ -0,0 +1,134 @@
+"""Incrementally maintained farm summary: counts, ETA order and attention list"""
+
+import pytest
+
+from conftest import FakeMQTTClient, mqtt_message
+
+
+@pytest.fixture
+def farm(fresh_status):
+    """Three connected, idle printers"""
+    status_api = fresh_status
+    clients = {}
+    for pid in (1, 2, 3):
+        printer = {'id': pid, 'ip': f'10.0.0.{pid}', 'access_code': '12345678', 'serial': f"SERIAL{pid:04d}"}
+        status_api.printer_status[pid] = status_api.initial_status(printer)
+        clients[pid] = status_api.mqtt_clients[pid] = FakeMQTTClient(pid)
+        status_api.on_connect(clients[pid], clients[pid].userdata, None, 0)
+    return clients
+
+
+def report(status_api, client, **fields):
+    status_api.on_message(client, client.userdata, mqtt_message(client.userdata['serial'], {'print': fields}))
+
+
+def printing(remaining, state='RUNNING'):
+    return {'gcode_state': state, 'gcode_file': 'part.3mf', 'mc_percent': 10, 'mc_remaining_time': remaining}
+
+
+def summary(status_api):
+    data = status_api.build_farm_summary()
+    assert_index_consistent(status_api)
+    return data
+
+
+def assert_index_consistent(status_api):
+    """The incremental aggregates must match a full recount of printer_status"""
+    expected = {state: 0 for state in status_api.FARM_STATES}
+    for pid, status in status_api.printer_status.items():
+        state = status_api.classify_farm_state(status)
+        expected[state] += 1
+        assert pid in status_api.farm_state_members[state]
+        assert (pid in status_api.attention_printers) == (state in status_api.ATTENTION_STATES)
+    assert status_api.farm_counts == expected
+    assert sum(len(m) for m in status_api.farm_state_members.values()) == len(status_api.printer_status)
+    assert status_api.eta_index == sorted(status_api.eta_index)
+    assert sorted(entry for entry, _ in status_api.printer_eta.values()) == status_api.eta_index
+
+
+def test_connected_printers_counted_idle(farm, fresh_status):
+    data = summary(fresh_status)
+    assert data['total'] == 3
+    assert data['counts']['idle'] == 3
+    assert data['next_jobs'] == []
+    assert data['attention'] == []
+
+
+def test_next_jobs_ordered_by_eta(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30))
+    report(fresh_status, farm[2], **printing(10))
+
+    data = summary(fresh_status)
+    assert data['counts']['printing'] == 2
+    assert data['counts']['idle'] == 1
+    assert [job['printer_id'] for job in data['next_jobs']] == [2, 1]
+    first, second = (job['time_remaining'] for job in data['next_jobs'])
+    assert 9 <= first <= 10 and 29 <= second <= 30
+
+
+def test_remaining_time_change_reslots_printer(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30))
+    report(fresh_status, farm[2], **printing(10))
+    report(fresh_status, farm[1], **printing(5))
+
+    data = summary(fresh_status)
+    assert [job['printer_id'] for job in data['next_jobs']] == [1, 2]
+    assert len(fresh_status.eta_index) == 2
+
+    # Repeated reports with the same remaining time leave the entry alone
+    entry = fresh_status.printer_eta[1]
+    report(fresh_status, farm[1], **printing(5))
+    assert fresh_status.printer_eta[1] is entry
+
+
+def test_finished_print_leaves_eta_index(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30))
+    report(fresh_status, farm[1], **{**printing(0), 'gcode_state': 'FINISH', 'mc_percent': 100})
+
+    data = summary(fresh_status)
+    assert data['next_jobs'] == []
+    assert data['counts']['idle'] == 3
+
+
+def test_paused_failed_and_offline_need_attention(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30, state='PAUSE'))
+    report(fresh_status, farm[2], **printing(30, state='FAILED'))
+    fresh_status.on_disconnect(farm[3], farm[3].userdata, 0)
+
+    data = summary(fresh_status)
+    assert data['attention'] == [
+        {'printer_id': 1, 'reason': 'paused'},
+        {'printer_id': 2, 'reason': 'failed'},
+        {'printer_id': 3, 'reason': 'offline'}
+    ]
+    assert data['counts'] == {'printing': 0, 'idle': 0, 'paused': 1, 'failed': 1, 'offline': 1}
+
+    # Resuming clears the attention entry
+    report(fresh_status, farm[1], **printing(30))
+    data = summary(fresh_status)
+    assert [a['printer_id'] for a in data['attention']] == [2, 3]
+    assert [job['printer_id'] for job in data['next_jobs']] == [1]
+
+
+def test_disconnect_drops_printer_from_eta_index(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30))
+    fresh_status.on_disconnect(farm[1], farm[1].userdata, 0)
+
+    data = summary(fresh_status)
+    assert data['next_jobs'] == []
+    assert data['counts']['offline'] == 1
+
+
+def test_removed_printer_leaves_every_aggregate(farm, fresh_status):
+    report(fresh_status, farm[1], **printing(30))
+    report(fresh_status, farm[2], **printing(10, state='PAUSE'))
+
+    fresh_status.disconnect_printer_mqtt(1)
+    fresh_status.disconnect_printer_mqtt(2)
+
+    data = summary(fresh_status)
+    assert farm[1].stopped and farm[2].stopped
+    assert data['total'] == 1
+    assert data['next_jobs'] == []
+    assert data['attention'] == []
+    assert 1 not in fresh_status.printer_farm_state and 2 not in fresh_status.printer_farm_state
@@ -0,0 +1,193 @@
+"""File browser: cached listings, .3mf thumbnails and the FTPS connection pool"""
+
+import datetime
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+pytest.importorskip('pyftpdlib')
+pytest.importorskip('OpenSSL')  # pyftpdlib's TLS handler needs pyOpenSSL
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from pyftpdlib.authorizers import DummyAuthorizer  # noqa: E402
+from pyftpdlib.handlers import TLS_FTPHandler  # noqa: E402
+from pyftpdlib.servers import ThreadedFTPServer  # noqa: E402
+
+import file_api  # noqa: E402
+import printer_config  # noqa: E402
+
+PNG = b'\x89PNG\r\n\x1a\nplate'
+
+
+def write_cert(directory):
+    """Self-signed certificate, like the printers use"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, '127.0.0.1')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(1)
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(hours=1))
+            .sign(key, hashes.SHA256()))
+
+    path = os.path.join(directory, 'cert.pem')
+    with open(path, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return path
+
+
+@pytest.fixture(scope='module')
+def ftps_server(tmp_path_factory):
+    """Stand-in printer SD card served over implicit FTPS"""
+    tmp_path = tmp_path_factory.mktemp('ftps')
+    root = tmp_path / 'sdcard'
+    (root / 'cache').mkdir(parents=True)
+    with zipfile.ZipFile(root / 'cache' / 'part.3mf', 'w') as archive:
+        # Large model data ahead of the thumbnail, so a full download would be noticed
+        archive.writestr('3D/3dmodel.model', os.urandom(512 * 1024))
+        archive.writestr('Metadata/plate_1.png', PNG)
+    (root / 'cache' / 'notes.txt').write_text('hello')
+
+    retr_offsets = []
+
+    class ImplicitTLSHandler(TLS_FTPHandler):
+        certfile = write_cert(str(tmp_path))
+        tls_control_required = True
+        tls_data_required = True
+
+        def handle(self):
+            self.secure_connection(self.ssl_context)
+
+        def handle_ssl_established(self):
+            TLS_FTPHandler.handle(self)
+
+        def ftp_RETR(self, file):
+            retr_offsets.append(self._restart_position)
+            return super().ftp_RETR(file)
+
+    authorizer = DummyAuthorizer()
+    authorizer.add_user('bblp', '12345678', str(root), perm='elr')
+    ImplicitTLSHandler.authorizer = authorizer
+    server = ThreadedFTPServer(('127.0.0.1', 0), ImplicitTLSHandler)
+    threading.Thread(target=server.serve_forever, kwargs={'timeout': 0.1}, daemon=True).start()
+
+    yield {'port': server.address[1], 'retr_offsets': retr_offsets}
+    server.close_all()
+
+
+@pytest.fixture
+def ftps_printer(ftps_server, printers_json, monkeypatch):
+    """Point file_api at the stand-in printer with empty caches and pools"""
+    monkeypatch.setattr(file_api, 'FTP_PORT', ftps_server['port'])
+    for cache in (file_api.listing_cache, file_api.thumbnail_cache, file_api.idle_connections, file_api.printer_slots):
+        cache.clear()
+    for key in file_api.stats:
+        monkeypatch.setitem(file_api.stats, key, 0)
+    ftps_server['retr_offsets'].clear()
+
+    yield ftps_server
+
+    for pool in file_api.idle_connections.values():
+        while not pool.empty():
+            file_api.close_quietly(pool.get_nowait()[0])
+
+
+@pytest.fixture
+def client():
+    return file_api.app.test_client()
+
+
+def idle(printer_id):
+    return file_api.idle_by_printer().get(printer_id, 0)
+
+
+def test_listing_served_from_cache(ftps_printer, client):
+    first = client.get('/api/files/printers/1?path=/cache').get_json()
+    assert first['cached'] is False
+    assert [e['name'] for e in first['entries']] == ['notes.txt', 'part.3mf']
+    assert first['entries'][1]['thumbnail'] == '/api/files/printers/1/thumbnail?path=/cache/part.3mf'
+
+    second = client.get('/api/files/printers/1?path=/cache').get_json()
+    assert second['cached'] is True
+    assert second['entries'] == first['entries']
+    assert file_api.stats['listings'] == 1
+
+    refreshed = client.get('/api/files/printers/1?path=/cache&refresh=1').get_json()
+    assert refreshed['cached'] is False
+    assert file_api.stats['listings'] == 2
+
+    # Both listings went over one pooled session
+    assert file_api.stats['connections_opened'] == 1
+
+
+def test_thumbnail_extracted_with_ranged_reads(ftps_printer, client):
+    resp = client.get('/api/files/printers/1/thumbnail?path=/cache/part.3mf')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/png'
+    assert resp.data == PNG
+
+    # Only the tail of the archive (directory and thumbnail) was fetched
+    assert ftps_printer['retr_offsets']
+    assert min(ftps_printer['retr_offsets']) > 0
+
+    cached = client.get('/api/files/printers/1/thumbnail?path=/cache/part.3mf',
+                        headers={'If-None-Match': resp.headers['ETag']})
+    assert cached.status_code == 304
+    assert file_api.stats['thumbnails'] == 1
+    assert file_api.stats['thumbnail_cache_hits'] == 1
+
+
+def test_missing_path_is_404_and_keeps_connection(ftps_printer, client):
+    assert client.get('/api/files/printers/1?path=/missing').status_code == 404
+    assert client.get('/api/files/printers/1/thumbnail?path=/missing/part.3mf').status_code == 404
+    assert client.get('/api/files/printers/1/thumbnail?path=/cache/other.3mf').status_code == 404
+
+    assert client.get('/api/files/printers/1?path=/cache').status_code == 200
+    assert file_api.stats['connections_opened'] == 1
+    assert idle(1) == 1
+
+
+def test_idle_connections_reaped(ftps_printer, client, monkeypatch):
+    client.get('/api/files/printers/1?path=/cache')
+    assert idle(1) == 1
+
+    file_api.reap_idle_connections()
+    assert idle(1) == 1
+
+    monkeypatch.setattr(file_api, 'FTP_IDLE_TIMEOUT', -1)
+    file_api.reap_idle_connections()
+    assert idle(1) == 0
+    assert file_api.stats['connections_reaped'] == 1
+
+
+def test_changed_ip_not_served_from_old_sessions(ftps_printer, client):
+    assert client.get('/api/files/printers/1?path=/cache').get_json()['cached'] is False
+    old_key = file_api.connection_key(printer_config.get_printer(1))
+
+    config = printer_config.editable_index()['config']
+    config['printers'][0]['ip'] = 'localhost'
+    printer_config.save_config(config)
+
+    # The listing from the old address isn't reused, and a new session is opened
+    assert client.get('/api/files/printers/1?path=/cache').get_json()['cached'] is False
+    assert file_api.stats['connections_opened'] == 2
+    assert client.get('/api/files/printers/1?path=/cache').get_json()['cached'] is True
+    assert file_api.stats['connections_opened'] == 2
+
+    # Sessions for the old address are never borrowed again, so the reaper closes them
+    old_pool = file_api.idle_connections[old_key]
+    ftp, _ = old_pool.get_nowait()
+    old_pool.put((ftp, time.time() - file_api.FTP_IDLE_TIMEOUT - 1))
+    file_api.reap_idle_connections()
+    assert old_pool.qsize() == 0
+    assert idle(1) == 1
@@ -0,0 +1,60 @@
+"""Reconnecting only the printers whose configuration changed"""
+
+import pytest
+
+import printer_config
+from conftest import FakeMQTTClient
+
+
+@pytest.fixture
+def connected(printers_json, fresh_status, monkeypatch):
+    """Every configured printer connected through a fake MQTT client"""
+    status_api = fresh_status
+
+    def connect(printer):
+        pid = printer['id']
+        if pid not in status_api.printer_status:
+            status_api.printer_status[pid] = status_api.initial_status(printer)
+        status_api.mqtt_clients[pid] = FakeMQTTClient(pid)
+        status_api.mqtt_client_settings[pid] = status_api.mqtt_settings(printer)
+        status_api.on_connect(status_api.mqtt_clients[pid], status_api.mqtt_clients[pid].userdata, None, 0)
+
+    monkeypatch.setattr(status_api, 'connect_printer_mqtt', connect)
+    status_api.initialize_mqtt_connections()
+    return status_api
+
+
+def test_reconnect_without_changes_keeps_sessions(connected):
+    clients = dict(connected.mqtt_clients)
+    connected.printer_status[1]['stale'] = True
+
+    resp = connected.app.test_client().post('/api/status/reconnect')
+    assert resp.get_json()['mqtt_clients'] == 8
+    assert connected.mqtt_clients == clients
+    assert connected.printer_status[1]['stale'] is True
+
+
+def test_reconnect_touches_only_changed_printers(connected):
+    clients = dict(connected.mqtt_clients)
+    config = printer_config.editable_index()['config']
+    config['printers'][1]['access_code'] = '87654321'
+    config['printers'] = [p for p in config['printers'] if p['id'] != 3]
+    printer_config.save_config(config)
+
+    connected.app.test_client().post('/api/status/reconnect')
+
+    assert sorted(connected.mqtt_clients) == [1, 2, 4, 5, 6, 7, 8]
+    assert connected.mqtt_clients[2] is not clients[2] and clients[2].stopped
+    assert clients[3].stopped and 3 not in connected.printer_status
+    assert all(connected.mqtt_clients[pid] is clients[pid] for pid in (1, 4, 5, 6, 7, 8))
+    assert connected.build_farm_summary()['total'] == 7
+
+
+def test_full_reconnect_replaces_every_client(connected):
+    clients = dict(connected.mqtt_clients)
+
+    connected.app.test_client().post('/api/status/reconnect?full=1')
+
+    assert sorted(connected.mqtt_clients) == sorted(clients)
+    assert all(connected.mqtt_clients[pid] is not clients[pid] for pid in clients)
+    assert all(client.stopped for client in clients.values())
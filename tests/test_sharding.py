@@ -0,0 +1,131 @@
+"""Shard placement and the merged cluster view with a shard down"""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import sharding
+import status_api
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def live_shard():
+    """Stand-in shard answering /api/status/printers for the printers it owns"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), None)
+    node = f"http://127.0.0.1:{server.server_address[1]}"
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            owned = status_api.owned_printer_ids(node)
+            if self.path.startswith('/api/status/summary'):
+                data = {'counts': {'idle': len(owned)}, 'next_jobs': [], 'attention': []}
+            else:
+                data = {str(pid): {'connected': True, 'gcode_state': 'IDLE'} for pid in owned}
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server.RequestHandlerClass = Handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield node, requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cluster(printers_json, live_shard, monkeypatch):
+    """Aggregator over one live shard and one shard with nothing listening"""
+    live_node, requests = live_shard
+    # Ports are random, so pick a down node that leaves printers on both shards
+    while True:
+        down_node = f"http://127.0.0.1:{free_port()}"
+        monkeypatch.setattr(sharding, 'SHARD_NODES', [live_node, down_node])
+        if status_api.owned_printer_ids(live_node) and status_api.owned_printer_ids(down_node):
+            break
+    monkeypatch.setattr(sharding, 'SHARD_SELF', '')
+    monkeypatch.setattr(sharding, 'SHARD_TIMEOUT', 1)
+    return status_api.app.test_client(), live_node, down_node, requests
+
+
+def test_placement_is_stable_and_minimal(monkeypatch):
+    printers = [{'id': i, 'serial': f'SERIAL{i:04d}'} for i in range(1, 201)]
+    nodes = ['http://a:5001', 'http://b:5001', 'http://c:5001']
+
+    monkeypatch.setattr(sharding, 'SHARD_NODES', nodes)
+    before = {p['id']: sharding.shard_for_printer(p) for p in printers}
+    assert before == {p['id']: sharding.shard_for_printer(p) for p in printers}
+    assert set(before.values()) == set(nodes)
+
+    # Removing a node only moves the printers that node owned
+    monkeypatch.setattr(sharding, 'SHARD_NODES', nodes[:2])
+    after = {p['id']: sharding.shard_for_printer(p) for p in printers}
+    moved = {pid for pid in before if before[pid] != after[pid]}
+    assert moved == {pid for pid, node in before.items() if node == nodes[2]}
+
+
+def test_owns_printer_without_sharding(monkeypatch):
+    monkeypatch.setattr(sharding, 'SHARD_NODES', [])
+    assert sharding.owns_printer({'id': 1, 'serial': 'X'})
+
+
+def test_down_shard_printers_reported_unavailable(cluster):
+    client, live_node, down_node, _ = cluster
+
+    resp = client.get('/api/status/cluster/printers')
+    assert resp.status_code == 200
+    data = resp.get_json()
+
+    assert data['shards'][live_node]['ok'] is True
+    assert data['shards'][down_node]['ok'] is False
+    assert set(data['printers']) == {str(i) for i in range(1, 9)}
+    for pid in status_api.owned_printer_ids(down_node):
+        assert data['printers'][str(pid)] == {'connected': False, 'shard_unavailable': True, 'shard': down_node}
+    for pid in status_api.owned_printer_ids(live_node):
+        assert data['printers'][str(pid)]['connected'] is True
+
+
+def test_down_shard_counted_offline_in_summary(cluster):
+    client, live_node, down_node, _ = cluster
+
+    data = client.get('/api/status/cluster/summary').get_json()
+    down_ids = status_api.owned_printer_ids(down_node)
+    assert data['total'] == 8
+    assert data['counts']['idle'] == len(status_api.owned_printer_ids(live_node))
+    assert data['counts']['offline'] == len(down_ids)
+    assert {a['printer_id'] for a in data['attention'] if a['reason'] == 'shard_unavailable'} == set(down_ids)
+
+
+def test_invalid_filter_rejected_before_fan_out(cluster):
+    client, _, _, requests = cluster
+
+    resp = client.get('/api/status/cluster/printers?state=bogus')
+    assert resp.status_code == 400
+    assert requests == []
+
+
+def test_unsharded_cluster_view_has_same_shape(printers_json, monkeypatch):
+    monkeypatch.setattr(sharding, 'SHARD_NODES', [])
+    client = status_api.app.test_client()
+
+    data = client.get('/api/status/cluster/printers').get_json()
+    assert set(data) == {'printers', 'shards'}
+    assert list(data['shards']) == ['local']
+
+    assert 'shards' in client.get('/api/status/cluster/summary').get_json()
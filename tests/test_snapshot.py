@@ -0,0 +1,120 @@
+"""Warm-start snapshot: save, load, stale entries and their confirmation over MQTT"""
+
+import json
+
+import pytest
+
+from conftest import FakeMQTTClient, mqtt_message
+
+PRINTING = {'connected': True, 'printing': True, 'print_status': 'RUNNING', 'print_file': 'part.3mf',
+            'print_progress': 40, 'print_time_remaining': 30, 'bed_temp': 60}
+
+
+class PahoStub(FakeMQTTClient):
+    """Enough of paho's Client for connect_printer_mqtt"""
+
+    def __init__(self, userdata):
+        super().__init__(userdata['printer_id'])
+        self.userdata = userdata
+
+    def username_pw_set(self, username, password):
+        pass
+
+    def tls_set(self, **kwargs):
+        pass
+
+    def tls_insecure_set(self, value):
+        pass
+
+    def connect(self, host, port, keepalive):
+        pass
+
+    def loop_start(self):
+        pass
+
+
+@pytest.fixture
+def snapshot_file(tmp_path, printers_json, fresh_status, monkeypatch):
+    path = tmp_path / 'status_snapshot.json'
+    monkeypatch.setattr(fresh_status, 'SNAPSHOT_FILE', str(path))
+    monkeypatch.setattr(fresh_status.mqtt, 'Client', PahoStub)
+    return path
+
+
+def write_snapshot(path, printers):
+    path.write_text(json.dumps({'saved_at': 0, 'printers': printers}))
+
+
+def entry(pid, **overrides):
+    return {**PRINTING, 'serial': f"SERIAL{pid:04d}", 'ip': '127.0.0.1', **overrides}
+
+
+def test_save_then_load_round_trip(snapshot_file, fresh_status):
+    status_api = fresh_status
+    status_api.printer_status[1] = entry(1)
+    status_api.save_snapshot()
+    assert not snapshot_file.with_suffix('.json.tmp').exists()
+
+    status_api.printer_status.clear()
+    status_api.load_snapshot()
+
+    status = status_api.printer_status[1]
+    assert status['stale'] is True
+    assert status['connected'] is False
+    assert status['print_file'] == 'part.3mf'
+    assert sorted(status_api.printer_status) == list(range(1, 9))
+
+
+def test_stale_entries_are_offline_and_out_of_next_jobs(snapshot_file, fresh_status):
+    write_snapshot(snapshot_file, {'1': entry(1), '2': entry(2)})
+    fresh_status.load_snapshot()
+
+    data = fresh_status.build_farm_summary()
+    assert data['counts']['offline'] == 8
+    assert data['next_jobs'] == []
+
+
+def test_mismatched_serial_or_ip_is_discarded(snapshot_file, fresh_status):
+    write_snapshot(snapshot_file, {
+        '1': entry(1, serial='OTHER'),
+        '2': entry(2, ip='10.9.9.9'),
+        '3': entry(3)
+    })
+    fresh_status.load_snapshot()
+
+    for pid in (1, 2):
+        assert 'stale' not in fresh_status.printer_status[pid]
+        assert fresh_status.printer_status[pid]['print_file'] == ''
+    assert fresh_status.printer_status[3]['stale'] is True
+
+
+def test_stale_entry_kept_until_report_confirms_it(snapshot_file, fresh_status):
+    status_api = fresh_status
+    write_snapshot(snapshot_file, {'1': entry(1)})
+    status_api.load_snapshot()
+
+    status_api.connect_printer_mqtt({'id': 1, 'ip': '127.0.0.1', 'access_code': '12345678', 'serial': 'SERIAL0001'})
+    client = status_api.mqtt_clients[1]
+    assert status_api.printer_status[1]['stale'] is True
+    assert status_api.printer_status[1]['print_file'] == 'part.3mf'
+
+    # Connecting and temperature-only reports don't confirm the print job
+    status_api.on_connect(client, client.userdata, None, 0)
+    status_api.on_message(client, client.userdata, mqtt_message('SERIAL0001', {'print': {'bed_temper': 61}}))
+    assert status_api.printer_status[1]['stale'] is True
+    assert status_api.printer_status[1]['bed_temp'] == 61
+    assert status_api.build_farm_summary()['next_jobs'] == []
+
+    status_api.on_message(client, client.userdata, mqtt_message('SERIAL0001', {'print': {
+        'gcode_state': 'RUNNING', 'gcode_file': 'part.3mf', 'mc_percent': 45, 'mc_remaining_time': 25}}))
+    assert status_api.printer_status[1]['stale'] is False
+    assert [job['printer_id'] for job in status_api.build_farm_summary()['next_jobs']] == [1]
+
+
+def test_missing_or_corrupt_snapshot_starts_empty(snapshot_file, fresh_status):
+    fresh_status.load_snapshot()
+    assert fresh_status.printer_status == {}
+
+    snapshot_file.write_text('{not json')
+    fresh_status.load_snapshot()
+    assert fresh_status.printer_status == {}
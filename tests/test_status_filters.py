@@ -0,0 +1,109 @@
+"""Field projection and printer filters on /api/status/printers"""
+
+import json
+
+import pytest
+
+import printer_config
+import status_api
+from conftest import FakeMQTTClient, mqtt_message
+
+STATUS = {
+    'connected': True,
+    'bed_temp': 60,
+    'print_status': 'RUNNING',
+    'ams': {
+        'has_ams': True,
+        'humidity': '3',
+        'trays': [{'id': '0', 'color': 'FF0000', 'type': 'PLA'}, {'id': '1', 'color': '00FF00', 'type': 'PETG'}]
+    }
+}
+
+
+def test_leaf_selects_whole_value():
+    assert status_api.parse_field_selection('bed_temp, ams.trays.color') == {'bed_temp': None, 'ams': {'trays': {'color': None}}}
+
+
+@pytest.mark.parametrize('fields', ['ams,ams.trays.color', 'ams.trays.color,ams'])
+def test_parent_field_wins_over_child_in_either_order(fields):
+    selection = status_api.parse_field_selection(fields)
+    assert selection == {'ams': None}
+    assert status_api.project_fields(STATUS, selection) == {'ams': STATUS['ams']}
+
+
+def test_projection_descends_through_lists():
+    selection = status_api.parse_field_selection('ams.trays.color,ams.trays.type,bed_temp')
+    assert status_api.project_fields(STATUS, selection) == {
+        'bed_temp': 60,
+        'ams': {'trays': [{'color': 'FF0000', 'type': 'PLA'}, {'color': '00FF00', 'type': 'PETG'}]}
+    }
+
+
+def test_unknown_fields_are_left_out():
+    assert status_api.project_fields(STATUS, status_api.parse_field_selection('nozzle_temp,ams.nothing,bed_temp')) == {'ams': {}, 'bed_temp': 60}
+
+
+def test_empty_fields_select_nothing():
+    assert status_api.parse_field_selection(' , ') == {}
+
+
+@pytest.fixture
+def farm(tmp_path, monkeypatch, fresh_status):
+    """Six printers in two groups, three of them printing"""
+    config_file = tmp_path / 'printers.json'
+    config_file.write_text(json.dumps({"printers": [
+        {"id": i, "name": f"P{i}", "ip": f"10.0.0.{i}", "access_code": "12345678", "serial": f"SERIAL{i:04d}",
+         "group": "Lab" if i <= 3 else "Shop", "tags": ["pla"] if i % 2 else ["petg"]}
+        for i in range(1, 7)
+    ]}))
+    monkeypatch.setattr(printer_config, 'CONFIG_FILE', str(config_file))
+    monkeypatch.setattr(printer_config, '_index', None)
+
+    for printer in printer_config.load_config()['printers']:
+        pid = printer['id']
+        client = FakeMQTTClient(pid)
+        status_api.printer_status[pid] = status_api.initial_status(printer)
+        status_api.on_connect(client, client.userdata, None, 0)
+        if pid in (1, 2, 5):
+            status_api.on_message(client, client.userdata, mqtt_message(client.userdata['serial'], {'print': {
+                'gcode_state': 'RUNNING', 'gcode_file': 'part.3mf', 'mc_percent': 10, 'mc_remaining_time': 30}}))
+    return status_api.app.test_client()
+
+
+def get_ids(client, query):
+    resp = client.get(f'/api/status/printers?{query}')
+    assert resp.status_code == 200
+    return sorted(int(pid) for pid in resp.get_json())
+
+
+def test_unfiltered_returns_every_printer(farm):
+    assert get_ids(farm, '') == [1, 2, 3, 4, 5, 6]
+
+
+def test_filters_combine_as_intersection(farm):
+    assert get_ids(farm, 'state=printing') == [1, 2, 5]
+    assert get_ids(farm, 'state=printing&group=Lab') == [1, 2]
+    assert get_ids(farm, 'state=printing&group=Lab&tag=pla') == [1]
+    assert get_ids(farm, 'ids=2,3,5&state=printing') == [2, 5]
+    assert get_ids(farm, 'ids=2,3,5&group=Shop&tag=pla') == [5]
+    assert get_ids(farm, 'state=idle,printing&tag=petg') == [2, 4, 6]
+
+
+def test_filters_with_projection(farm):
+    resp = farm.get('/api/status/printers?group=Shop&state=printing&fields=print_status,ams.trays.color')
+    assert resp.get_json() == {'5': {'print_status': 'RUNNING', 'ams': {'trays': []}}}
+
+
+def test_unknown_ids_and_groups_match_nothing(farm):
+    assert get_ids(farm, 'ids=42') == []
+    assert get_ids(farm, 'group=Nowhere') == []
+
+
+@pytest.mark.parametrize('query, error', [
+    ('state=printing,bogus', 'Unknown state: bogus'),
+    ('ids=1,x', 'ids must be a comma-separated list of integers'),
+])
+def test_invalid_filters_rejected(farm, query, error):
+    resp = farm.get(f'/api/status/printers?{query}')
+    assert resp.status_code == 400
+    assert resp.get_json()['error'] == error
@@ -3,6 +3,12 @@ let printersConfig = [];
 const lastKnownStatus = {};
 let statusUpdateInterval = null;
 
+// Camera thumbnails: the grid shows cached frames, only one printer streams live
+const THUMBNAIL_REFRESH_MS = 5000;
+const thumbnailEtags = {};
+let thumbnailInterval = null;
+let livePrinterId = null;
+
 // Check if setup is required and redirect
 async function checkSetupRequired() {
     try {
@@ -43,9 +49,9 @@ function createPrinterCard(printer) {
             <span class="stream-status" id="stream-status-${printer.id}">●</span>
         </div>
         <div class="video-container" id="container-${printer.id}">
-            <iframe class="camera-video" id="video-${printer.id}"
-                    src="/stream.html?src=printer${printer.id}"
-                    allowfullscreen></iframe>
+            <img class="camera-video camera-thumbnail" id="thumb-${printer.id}" alt=""
+                 onclick="setLivePrinter(${printer.id})" title="Click to watch live">
+            <button class="live-btn" id="live-btn-${printer.id}" onclick="toggleLive(${printer.id})" title="Watch live">▶</button>
             <button class="fullscreen-btn" onclick="toggleFullscreen('container-${printer.id}')" title="Fullscreen">⛶</button>
         </div>
         <div class="printer-status" id="status-${printer.id}">
@@ -204,11 +210,105 @@ function loadLayoutPreference() {
     applyLayout(savedLayout);
 }
 
+// Refresh a printer's thumbnail, only swapping the image when the frame changed
+async function refreshThumbnail(printerId) {
+    const img = document.getElementById(`thumb-${printerId}`);
+    if (!img) return;
+
+    try {
+        const response = await fetch(`/api/camera/printers/${printerId}/frame.jpg`, { cache: 'no-cache' });
+        if (!response.ok) return;
+
+        const etag = response.headers.get('ETag');
+        if (etag && etag === thumbnailEtags[printerId]) return;
+        thumbnailEtags[printerId] = etag;
+
+        const blob = await response.blob();
+        const oldUrl = img.src;
+        img.src = URL.createObjectURL(blob);
+        if (oldUrl && oldUrl.startsWith('blob:')) {
+            URL.revokeObjectURL(oldUrl);
+        }
+    } catch (error) {
+        console.error(`Error loading thumbnail for printer ${printerId}:`, error);
+    }
+}
+
+// Refresh thumbnails for every printer that isn't streaming live
+function refreshThumbnails() {
+    printersConfig.forEach(printer => {
+        if (printer.id !== livePrinterId) {
+            refreshThumbnail(printer.id);
+        }
+    });
+}
+
+// Stop a printer's live stream and go back to its thumbnail
+function stopLive(printerId) {
+    const video = document.getElementById(`video-${printerId}`);
+    if (video) video.remove();
+
+    const img = document.getElementById(`thumb-${printerId}`);
+    if (img) img.style.display = '';
+
+    const btn = document.getElementById(`live-btn-${printerId}`);
+    if (btn) {
+        btn.textContent = '▶';
+        btn.title = 'Watch live';
+    }
+
+    if (livePrinterId === printerId) {
+        livePrinterId = null;
+        refreshThumbnail(printerId);
+    }
+}
+
+// Stream one printer live, returning the previous live printer to its thumbnail
+function setLivePrinter(printerId) {
+    if (livePrinterId === printerId) return;
+    if (livePrinterId !== null) {
+        stopLive(livePrinterId);
+    }
+
+    const container = document.getElementById(`container-${printerId}`);
+    if (!container) return;
+
+    const video = document.createElement('iframe');
+    video.className = 'camera-video';
+    video.id = `video-${printerId}`;
+    video.src = `/stream.html?src=printer${printerId}`;
+    video.allowFullscreen = true;
+    container.insertBefore(video, container.firstChild);
+
+    const img = document.getElementById(`thumb-${printerId}`);
+    if (img) img.style.display = 'none';
+
+    const btn = document.getElementById(`live-btn-${printerId}`);
+    if (btn) {
+        btn.textContent = '■';
+        btn.title = 'Stop live view';
+    }
+
+    livePrinterId = printerId;
+}
+
+// Live button handler
+function toggleLive(printerId) {
+    if (livePrinterId === printerId) {
+        stopLive(printerId);
+    } else {
+        setLivePrinter(printerId);
+    }
+}
+
 // Fullscreen toggle function
 function toggleFullscreen(containerId) {
     const container = document.getElementById(containerId);
     if (!container) return;
 
+    // Fullscreen always shows the live stream
+    setLivePrinter(parseInt(containerId.replace('container-', ''), 10));
+
     if (!document.fullscreenElement) {
         // Enter fullscreen
         if (container.requestFullscreen) {
@@ -485,6 +585,9 @@ async function initialize() {
     if (printersConfig.length > 0) {
         updateStatuses(); // Initial update
         statusUpdateInterval = setInterval(updateStatuses, 2000); // Update every 2 seconds
+
+        refreshThumbnails();
+        thumbnailInterval = setInterval(refreshThumbnails, THUMBNAIL_REFRESH_MS);
     }
 }
 
@@ -501,4 +604,7 @@ window.addEventListener('beforeunload', () => {
     if (statusUpdateInterval) {
         clearInterval(statusUpdateInterval);
     }
+    if (thumbnailInterval) {
+        clearInterval(thumbnailInterval);
+    }
 });